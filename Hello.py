@@ -52,6 +52,9 @@ with st.expander(label="Determining three point percentages and plus-minus stati
     \n
     \b
     Informally, bWPM is a measurement of player plus-minus, adjusted both for the other players on the floor and for genuine improvements in player abilities.
+    \n
+    bWPM is a fixed fit over games through the 2023-24 season. A separate stat, decayed adjusted plus-minus (dAPM), is refreshed nightly from new games: it is the same
+    exponentially weighted, margin-adjusted plus-minus with a flat prior, reported in points per game rather than on the bWPM scale.
  
 
     """
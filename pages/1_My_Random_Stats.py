@@ -14,6 +14,7 @@ with tab1:
     render_b3P(player)
     render_dvr3P()
     render_bWPM(player)
+    render_dAPM(player)
 
 with tab2:
     st.title("Team Stats")
@@ -15,7 +15,7 @@ st.warning("Note: I have yet to implement a few exceptions, so some current rost
 st.title("Roster Construction Models")
 st.subheader("Model v3: Soft cap with Bird/Early Bird/Non-Bird/Minimum Exceptions, Single-year scope")
 st.markdown("For background on this model, see [here](https://github.com/nehal-chigurupati/RosterConstruction/blob/main/README.pdf)")
-player_df = pd.read_csv("pages/data/player_df.csv")
+player_df = get_player_df()
 
 fixed_player_names, available_vets, available_player_names, salary_cap_pct, play_time_constraint = render_inputs(player_df["Player"].tolist())
 num_years_on_team = []
@@ -23,15 +23,32 @@ for i in available_vets:
     number = st.number_input("Enter " + i + "'s number of consecutive years on the team", 1, 20, "min", 1)
     num_years_on_team.append(number)
 
+use_milp = st.checkbox("Use MILP solver (HiGHS) instead of GEKKO/APOPT", value=False)
 exec_model = st.button("Optimize")
 
 
 if exec_model:
     try:
-        roster, e_win_pct = optimize(fixed_player_names, available_vets, num_years_on_team, available_player_names, player_df, salary_cap_pct, play_time_constraint, _callback=gekko_callback)
+        roster, e_win_pct = optimize(fixed_player_names, available_vets, num_years_on_team, available_player_names, player_df, salary_cap_pct, play_time_constraint, _callback=gekko_callback, engine="milp" if use_milp else "gekko")
 
         st.dataframe(roster, use_container_width=True)
         st.write("Expected win percent: " + str(e_win_pct * 100) + "%")
         #st.write("Percent of salary cap spent: " + str(np.sum(roster["Salary Cap Percent"]) * 100) + "%")
     except:
-        st.write("No possible roster configuration possible (this may be because I haven't programmed all exceptions yet). Try increasing the total budget")
\ No newline at end of file
+        st.write("No possible roster configuration possible (this may be because I haven't programmed all exceptions yet). Try increasing the total budget")
+st.subheader("Budget sweep")
+st.markdown("Solves the roster above for every budget from 0.9 to 3.0 times the salary cap, with and without the play time constraint, and plots the best expected win percent against the payroll it takes.")
+sweep_model = st.button("Sweep budgets")
+
+if sweep_model:
+    sweep_status = st.empty()
+    sweep_chart = st.empty()
+    sweep_results = []
+    num_scenarios = 2 * len(SWEEP_BUDGETS)
+    for result in sweep_rosters(fixed_player_names, available_vets, num_years_on_team, available_player_names, player_df, engine="milp" if use_milp else "gekko"):
+        sweep_results.append(result)
+        sweep_status.text(f"Solved {len(sweep_results)} of {num_scenarios} scenarios")
+        sweep_chart.plotly_chart(frontier_chart(pd.DataFrame(sweep_results)), use_container_width=True, key=f"sweep_chart_{len(sweep_results)}")
+
+    sweep_results = pd.DataFrame(sweep_results).sort_values(["Play time constraint", "Budget"])
+    st.dataframe(sweep_results, use_container_width=True, hide_index=True)
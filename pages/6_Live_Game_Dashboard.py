@@ -14,8 +14,25 @@ from pages.components.sidebar import *
 st.set_page_config(layout="wide")
 render_sidebar("Live_Game_Dashboard")
 
+view = st.radio("View", ["Single game", "Scoreboard wall"], horizontal=True)
+if view == "Scoreboard wall":
+    live_version = get_live_version()
+    try:
+        render_scoreboard_wall()
+    except Exception:
+        st.subheader("The NBA's website is blocking my requests right now.")
+        st.stop()
+    if st.checkbox(label="Autorefresh", value=False, key="wall_autorefresh"):
+        wait_for_live_update(live_version)
+        st.rerun()
+    st.stop()
+
 #Get user input for game
-active_games = get_active_games()
+try:
+    active_games = get_active_games()
+except Exception:
+    st.subheader("The NBA's website is blocking my requests right now.")
+    st.stop()
 game=None
 if len(active_games.keys()) == 0:
     st.subheader("No active games")
@@ -29,6 +46,7 @@ else:
 if game:
     #Load data
     data_load_state = st.text("Refreshing...")
+    live_version = get_live_version()
     scoreboard_data, pbp_data, away_team_data, home_team_data, away_team_statistics, home_team_statistics = load_all_data(game_id)
     data_load_state.text("Done!")
     data_load_state.text("Last Refreshed at " + str(datetime.now()))
@@ -56,14 +74,7 @@ if game:
 
 # Loop for refreshing data
 if len(active_games) != 0 and auto_refresh:
-    while True:
-        # Update this part to fetch your live data
-        scoreboard_data = load_scoreboard_data(game_id)
-        pbp_data = load_playbyplay_data(game_id, scoreboard_data["gameStatusText"] != "Final")
-        away_team_data, home_team_data, away_team_statistics, home_team_statistics = load_box_score_data(game_id)
-
-        # Wait for a seconds before the next update 
-        time.sleep(5)
-
-        # Refresh the page
-        st.rerun()
+    #Rerun as soon as the background poller publishes newer data, or after a short wait so widget
+    #changes (e.g. unticking Autorefresh) are picked up between polls
+    wait_for_live_update(live_version)
+    st.rerun()
@@ -7,6 +7,8 @@ from pathlib import Path
 import importlib
 from retry import retry
 
+from pages.components.Data_Access import fetch
+
 def extract_api_params(json_data):
     endpoint_name = json_data["endpoint"]
     import_name = endpoint_name.lower()
@@ -19,7 +21,7 @@ def extract_api_params(json_data):
 @retry()
 @st.cache_data
 def load_game_data(season_type_all_star, season):
-    data = leaguegamelog.LeagueGameLog(season_type_all_star=season_type_all_star, season=season, league_id="00")
+    data = fetch(leaguegamelog.LeagueGameLog, season_type_all_star=season_type_all_star, season=season, league_id="00")
     data = data.get_data_frames()[0]
     for column in data.columns:
         data[column] = data[column].astype(str)
@@ -94,14 +96,10 @@ def render_endpoint(endpoint_dict, key_start):
             key_start += 1
 
         if num_inputs_entered == len(req_params):
-            import_statement = f"from nba_api.stats.endpoints import {import_name}"
-            exec_string =  import_statement + "\n"
-            exec_string = exec_string + "data = " + import_name + "." + endpoint_name + str(param_input).replace("[", "(").replace("]", ")")
-
-            exec_globals = {}
-            exec(exec_string, exec_globals)
+            endpoint_module = importlib.import_module("nba_api.stats.endpoints." + import_name)
+            endpoint = getattr(endpoint_module, endpoint_name)
 
-            output = exec_globals.get("data")
+            output = fetch(endpoint, *param_input)
             output = output.get_data_frames()
 
             st.header("Results")
@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import pandas as pd
 #import pymc as pm
@@ -8,6 +9,7 @@ from retry import retry
 import streamlit as st
 #from filterpy.kalman import KalmanFilter
 import plotly.graph_objs as go
+import plotly.io as pio
 from scipy import stats
 from pygwalker.api.streamlit import StreamlitRenderer
 
@@ -15,23 +17,23 @@ from nba_api.stats.endpoints import playercareerstats, playergamelog, teamestima
 from nba_api.stats.static import players
 
 from pages.components.Terminal_Redirect import *
+from pages.components.Data_Access import fetch, fetch_many
+from pages.components.Data_Catalog import load_table, get_table_version, lookup_player, lookup_team
 
 @st.cache_data()
 def get_all_season_data(player_id):
-   return playercareerstats.PlayerCareerStats(player_id=player_id).get_data_frames()[0]["SEASON_ID"].tolist()
+   return fetch(playercareerstats.PlayerCareerStats, player_id=player_id).get_data_frames()[0]["SEASON_ID"].tolist()
 
 @st.cache_data()
 @retry()
 def get_season_data(player_id, season):
-   return playergamelog.PlayerGameLog(player_id=player_id, season=season).get_data_frames()[0]
+   return fetch(playergamelog.PlayerGameLog, player_id=player_id, season=season).get_data_frames()[0]
 
 @st.cache_data()
 def get_player_game_percentages(player_id):
   all_seasons = get_all_season_data(player_id)
-  logs = []
-  for i in stqdm(range(len(all_seasons))):
-    logs.append(get_season_data(player_id, all_seasons[i]))
-    time.sleep(.25)
+  responses = fetch_many(playergamelog.PlayerGameLog, [{"player_id": player_id, "season": season} for season in all_seasons])
+  logs = [response.get_data_frames()[0] for response in responses]
 
   log = pd.concat(logs)
   log = log.sort_values('Game_ID')
@@ -73,9 +75,8 @@ def compute_b3P(player_id):
 
   return trace, mean, hdi_lower, hdi_upper
 """
-@st.cache_data()
-def compute_bWPM(player_id, bWPM_df):
-   player_data = bWPM_df[bWPM_df["PLAYER_ID"] == player_id]
+def compute_bWPM(player_id):
+   player_data = lookup_player("bWPM", player_id)
    percentile = player_data["PERCENTILE"]
    mean = player_data["MEAN"]
    lower_bound = player_data["HDI_LOWER_BOUND"]
@@ -83,12 +84,17 @@ def compute_bWPM(player_id, bWPM_df):
 
    return percentile, mean, lower_bound, upper_bound
 
+def compute_dAPM(player_id):
+   player_data = lookup_player("dAPM", player_id)
+
+   return player_data["PERCENTILE"], player_data["MEAN"], player_data["CI_LOWER_BOUND"], player_data["CI_UPPER_BOUND"]
+
     
 
 @retry()
 @st.cache_data()
 def get_estimated_metrics(season="2023-24"):
-    return teamestimatedmetrics.TeamEstimatedMetrics(season=season).get_data_frames()[0]
+    return fetch(teamestimatedmetrics.TeamEstimatedMetrics, season=season).get_data_frames()[0]
 
 def get_team_metrics(team_full_name, data):
   ratings = data[data["TEAM_NAME"] == team_full_name][["E_OFF_RATING", "E_DEF_RATING"]]
@@ -113,7 +119,7 @@ def render_player_selection():
 @retry()
 @st.cache_data()
 def get_boxscore(game_id):
-  return boxscoreadvancedv3.BoxScoreAdvancedV3(game_id=game_id).get_data_frames()[1]
+  return fetch(boxscoreadvancedv3.BoxScoreAdvancedV3, game_id=game_id).get_data_frames()[1]
 
 
 @st.cache_data()
@@ -237,120 +243,67 @@ def get_nba_teams():
 
   return nba_teams
 
-def render_b3P_leaguewide_plot(values, names):
-  percentiles = [stats.percentileofscore(values, value) for value in values]
-  sorted_data = sorted(zip(percentiles, names, values), reverse=True)
-  sorted_data = sorted_data[:-1]
-
-  sections = {
-      '90-100th percentile': [],
-      '80-90th percentile': [],
-      '70-80th percentile': [],
-      '60-70th percentile': [],
-      '50-60th percentile': [],
-      '40-50th percentile': [],
-      '30-40th percentile': [],
-      '20-30th percentile': []
-  }
-
-  for percentile, name, value in sorted_data:
-      if percentile >= 90:
-          sections['90-100th percentile'].append((percentile, value, name))
-      elif percentile >= 80:
-          sections['80-90th percentile'].append((percentile, value, name))
-      elif percentile >= 70:
-          sections['70-80th percentile'].append((percentile, value, name))
-      elif percentile >= 60:
-          sections['60-70th percentile'].append((percentile, value, name))
-      elif percentile >= 50:
-          sections['50-60th percentile'].append((percentile, value, name))
-      elif percentile >= 40:
-          sections['40-50th percentile'].append((percentile, value, name))
-      elif percentile >= 30:
-          sections['30-40th percentile'].append((percentile, value, name))
-      else:
-          sections['20-30th percentile'].append((percentile, value, name))
-
-  traces = []
-  for section_name, section_data in sections.items():
-      percentiles, values, names = zip(*section_data)
-      trace = go.Scatter(
-          x=percentiles,
-          y=values,
-          mode='markers',
-          text=names,
-          marker=dict(
-              size=10,
-              opacity=0.7,
-              line=dict(width=1),
-          ),
-          name=section_name
-      )
-      traces.append(trace)
-
-  layout = go.Layout(title='League-wide b3P%', xaxis=dict(title='Percentile Range'), yaxis=dict(title="b3P%"), showlegend=True)
-
-  fig = go.Figure(data=traces, layout=layout)
-
-  st.plotly_chart(fig, use_container_width=True)
-
-def render_dvr3P_leaguewide_plot(values, names):
-  percentiles = [stats.percentileofscore(values, value) for value in values]
-  sorted_data = sorted(zip(percentiles, names, values), reverse=True)
-  sorted_data = sorted_data[:-1]
-
-  sections = {
-      '90-100th percentile': [],
-      '80-90th percentile': [],
-      '70-80th percentile': [],
-      '60-70th percentile': [],
-      '50-60th percentile': [],
-      '40-50th percentile': [],
-      '30-40th percentile': [],
-      '20-30th percentile': []
-  }
+percentile_sections = [
+    '20-30th percentile',
+    '30-40th percentile',
+    '40-50th percentile',
+    '50-60th percentile',
+    '60-70th percentile',
+    '70-80th percentile',
+    '80-90th percentile',
+    '90-100th percentile'
+]
+percentile_bins = [30, 40, 50, 60, 70, 80, 90]
+
+def compute_percentiles(values):
+  #Same as stats.percentileofscore(values, value) for every value, from one ranking pass instead of n scans
+  values = np.asarray(values, dtype=float)
+  return stats.rankdata(values) / len(values) * 100
+
+#Figures are cached as JSON per (dataset, version), so the values themselves aren't hashed on every rerun
+@st.cache_data()
+def build_percentile_figure(dataset, version, stat_name, _values, _names, _percentiles=None, drop_lowest=True):
+  values = np.asarray(_values, dtype=float)
+  names = np.asarray(_names, dtype=object)
+  percentiles = compute_percentiles(values) if _percentiles is None else np.asarray(_percentiles, dtype=float)
 
-  for percentile, name, value in sorted_data:
-      if percentile >= 90:
-          sections['90-100th percentile'].append((percentile, value, name))
-      elif percentile >= 80:
-          sections['80-90th percentile'].append((percentile, value, name))
-      elif percentile >= 70:
-          sections['70-80th percentile'].append((percentile, value, name))
-      elif percentile >= 60:
-          sections['60-70th percentile'].append((percentile, value, name))
-      elif percentile >= 50:
-          sections['50-60th percentile'].append((percentile, value, name))
-      elif percentile >= 40:
-          sections['40-50th percentile'].append((percentile, value, name))
-      elif percentile >= 30:
-          sections['30-40th percentile'].append((percentile, value, name))
-      else:
-          sections['20-30th percentile'].append((percentile, value, name))
+  order = np.argsort(-percentiles, kind="stable")
+  if drop_lowest:
+    order = order[:-1]
+  sections = np.digitize(percentiles[order], percentile_bins)
 
   traces = []
-  for section_name, section_data in sections.items():
-      percentiles, values, names = zip(*section_data)
+  for section in range(len(percentile_sections) - 1, -1, -1):
+      in_section = order[sections == section]
+      if len(in_section) == 0:
+        continue
       trace = go.Scatter(
-          x=percentiles,
-          y=values,
+          x=percentiles[in_section],
+          y=values[in_section],
           mode='markers',
-          text=names,
+          text=names[in_section],
           marker=dict(
               size=10,
               opacity=0.7,
               line=dict(width=1),
           ),
-          name=section_name
+          name=percentile_sections[section]
       )
       traces.append(trace)
 
-  layout = go.Layout(title='League-wide dvr3P%', xaxis=dict(title='Percentile Range'), yaxis=dict(title="dvr3P%"), showlegend=True)
+  layout = go.Layout(
+      title='League-wide ' + stat_name,
+      xaxis=dict(title='Percentile Range'),
+      yaxis=dict(title=stat_name),
+      showlegend=True,
+  )
 
-  fig = go.Figure(data=traces, layout=layout)
+  return go.Figure(data=traces, layout=layout).to_json()
 
-  st.plotly_chart(fig, use_container_width=True)
+def render_percentile_plot(dataset, version, values, names, stat_name, percentiles=None, drop_lowest=True):
+  fig_json = build_percentile_figure(dataset, version, stat_name, _values=values, _names=names, _percentiles=percentiles, drop_lowest=drop_lowest)
 
+  st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
 
 def render_b3P(player_df):
     player_id = player_df["id"].tolist()[0]
@@ -360,11 +313,11 @@ def render_b3P(player_df):
         if render_explore_b3P:
           renderer = get_pyg_renderer("pages/data/b3P.csv")
           renderer.render_explore()
-        b3P_df = pd.read_csv("pages/data/b3P.csv")
+        b3P_df = load_table("b3P")
 
         try:
             #trace, mean, lower, upper = compute_b3P(player_id)
-            player_row = b3P_df[b3P_df["player_id"] == player_id]
+            player_row = lookup_player("b3P", player_id)
             mean, lower, upper, percentile = player_row["mean"].iloc[0], player_row["hdi_lower"].iloc[0], player_row["hdi_upper"].iloc[0], player_row["percentile"].iloc[0]
             st.code("Percentile: " + str(percentile))
             st.code("Raw b3P: " + str(mean * 100) + "%")
@@ -378,7 +331,7 @@ def render_b3P(player_df):
         except:
           st.text("Precomputed value unavailable. This could be because the player does not take sufficiently many 3P shots, or because this stat is only available for players in the top 200 minutes played per game in the 2023-24 season. ")
         
-        render_b3P_leaguewide_plot(b3P_df["mean"].tolist(), b3P_df["player_name"].tolist())
+        render_percentile_plot("b3P", get_table_version("b3P"), b3P_df["mean"].tolist(), b3P_df["player_name"].tolist(), stat_name="b3P%")
         
   
 def render_kORTG_team_selection():
@@ -395,72 +348,9 @@ def render_tRNG_team_selection():
 
   return team_name
 
-def render_kORTG_leaguewide_plot(values, names):
-  percentiles = [stats.percentileofscore(values, value) for value in values]
-  sorted_data = sorted(zip(percentiles, names, values), reverse=True)
-  sorted_data = sorted_data[:-1]
-
-  sections = {
-      '90-100th percentile': [],
-      '80-90th percentile': [],
-      '70-80th percentile': [],
-      '60-70th percentile': [],
-      '50-60th percentile': [],
-      '40-50th percentile': [],
-      '30-40th percentile': [],
-      '20-30th percentile': []
-  }
-
-  for percentile, name, value in sorted_data:
-      if percentile >= 90:
-          sections['90-100th percentile'].append((percentile, value, name))
-      elif percentile >= 80:
-          sections['80-90th percentile'].append((percentile, value, name))
-      elif percentile >= 70:
-          sections['70-80th percentile'].append((percentile, value, name))
-      elif percentile >= 60:
-          sections['60-70th percentile'].append((percentile, value, name))
-      elif percentile >= 50:
-          sections['50-60th percentile'].append((percentile, value, name))
-      elif percentile >= 40:
-          sections['40-50th percentile'].append((percentile, value, name))
-      elif percentile >= 30:
-          sections['30-40th percentile'].append((percentile, value, name))
-      else:
-          sections['20-30th percentile'].append((percentile, value, name))
-
-  traces = []
-  for section_name, section_data in sections.items():
-      percentiles, values, names = zip(*section_data)
-      trace = go.Scatter(
-          x=percentiles,
-          y=values,
-          mode='markers',
-          text=names,
-          marker=dict(
-              size=10,
-              opacity=0.7,
-              line=dict(width=1),
-          ),
-          name=section_name
-      )
-      traces.append(trace)
-
-  layout = go.Layout(
-      title='League-wide kORTG',
-      xaxis=dict(title='Percentile Range'),
-      yaxis=dict(title='kORTG'),
-      showlegend=True,
-  )
-
-  fig = go.Figure(data=traces, layout=layout)
-
-  st.plotly_chart(fig, use_container_width=True)
-   
-
 def render_kORTG(team_abbrev):
   with st.expander("Kalman Offensive Rating", expanded=True):
-    kORTG_df = pd.read_csv("pages/data/kORTG.csv")
+    kORTG_df = load_table("kORTG")
     render_explore_kORTG = st.toggle("Explore Data", value=False, key=2)
     if render_explore_kORTG:
       renderer = get_pyg_renderer("pages/data/kORTG.csv")
@@ -484,87 +374,24 @@ def render_kORTG(team_abbrev):
 
       teams = list(kORTG_df.columns)
       kortg_vals = [[i for i in kORTG_df[i].dropna().tolist()][-1] for i in teams]
-      render_kORTG_leaguewide_plot(kortg_vals, teams)
+      render_percentile_plot("kORTG", get_table_version("kORTG"), kortg_vals, teams, stat_name="kORTG")
 
     except:
            st.code("Error in computation. Reporting bug. ")
   
 
-def render_bWPM_box_plot(bWPM_df):
-  names = bWPM_df["PLAYER_NAME"].tolist()
-  values = bWPM_df["MEAN"].tolist()
-  percentiles = bWPM_df["PERCENTILE"].tolist()
-  sorted_data = sorted(zip(percentiles, names, values), reverse=True)
-
-  sections = {
-      '90-100th percentile': [],
-      '80-90th percentile': [],
-      '70-80th percentile': [],
-      '60-70th percentile': [],
-      '50-60th percentile': [],
-      '40-50th percentile': [],
-      '30-40th percentile': [],
-      '20-30th percentile': []
-  }
-
-  for percentile, name, value in sorted_data:
-      if percentile >= 90:
-          sections['90-100th percentile'].append((percentile, value, name))
-      elif percentile >= 80:
-          sections['80-90th percentile'].append((percentile, value, name))
-      elif percentile >= 70:
-          sections['70-80th percentile'].append((percentile, value, name))
-      elif percentile >= 60:
-          sections['60-70th percentile'].append((percentile, value, name))
-      elif percentile >= 50:
-          sections['50-60th percentile'].append((percentile, value, name))
-      elif percentile >= 40:
-          sections['40-50th percentile'].append((percentile, value, name))
-      elif percentile >= 30:
-          sections['30-40th percentile'].append((percentile, value, name))
-      else:
-          sections['20-30th percentile'].append((percentile, value, name))
-
-  traces = []
-  for section_name, section_data in sections.items():
-      percentiles, values, names = zip(*section_data)
-      trace = go.Scatter(
-          x=percentiles,
-          y=values,
-          mode='markers',
-          text=names,
-          marker=dict(
-              size=10,
-              opacity=0.7,
-              line=dict(width=1),
-          ),
-          name=section_name
-      )
-      traces.append(trace)
-
-  layout = go.Layout(
-      title='League-wide bWPM',
-      xaxis=dict(title='Percentile Range'),
-      yaxis=dict(title='bWPM'),
-      showlegend=True,
-  )
-
-  fig = go.Figure(data=traces, layout=layout)
-
-  st.plotly_chart(fig, use_container_width=True)
-
 def render_bWPM(player):
    player_id = player["id"].tolist()[0]
    
-   bWPM_data = pd.read_csv("pages/data/bWPM.csv")
+   bWPM_data = load_table("bWPM")
    with st.expander('Bayesian Weighted Plus-Minus', expanded=True):
       render_explore_bWPM = st.toggle("Explore Data", value=False, key=3)
       if render_explore_bWPM:
         renderer = get_pyg_renderer("pages/data/bWPM.csv")
         renderer.render_explore()
       st.markdown("**bWPM**")
-      if player_id in bWPM_data["PLAYER_ID"].tolist():
-        percentile, mean, hdi_lower, hdi_upper = compute_bWPM(player_id, bWPM_data)
+      percentile, mean, hdi_lower, hdi_upper = compute_bWPM(player_id)
+      if len(mean) > 0:
         st.code("Percentile: " + str(percentile.iloc[0]))
         st.code("Raw Score: " + str(mean.iloc[0]))
 
@@ -580,128 +407,93 @@ def render_bWPM(player):
       else:
          st.text("bWPM only available for players in the top 200 minutes per game played in the 2023-24 season.")
       
-      render_bWPM_box_plot(bWPM_data)
-
-def render_tRNG_leaguewide_plot(values, names, stat_name):
-  percentiles = [stats.percentileofscore(values, value) for value in values]
-  sorted_data = sorted(zip(percentiles, names, values), reverse=True)
-  sorted_data = sorted_data[:-1]
-
-  sections = {
-      '90-100th percentile': [],
-      '80-90th percentile': [],
-      '70-80th percentile': [],
-      '60-70th percentile': [],
-      '50-60th percentile': [],
-      '40-50th percentile': [],
-      '30-40th percentile': [],
-      '20-30th percentile': []
-  }
+      render_percentile_plot("bWPM", get_table_version("bWPM"), bWPM_data["MEAN"].tolist(), bWPM_data["PLAYER_NAME"].tolist(), stat_name="bWPM", percentiles=bWPM_data["PERCENTILE"].tolist(), drop_lowest=False)
 
-  for percentile, name, value in sorted_data:
-      if percentile >= 90:
-          sections['90-100th percentile'].append((percentile, value, name))
-      elif percentile >= 80:
-          sections['80-90th percentile'].append((percentile, value, name))
-      elif percentile >= 70:
-          sections['70-80th percentile'].append((percentile, value, name))
-      elif percentile >= 60:
-          sections['60-70th percentile'].append((percentile, value, name))
-      elif percentile >= 50:
-          sections['50-60th percentile'].append((percentile, value, name))
-      elif percentile >= 40:
-          sections['40-50th percentile'].append((percentile, value, name))
-      elif percentile >= 30:
-          sections['30-40th percentile'].append((percentile, value, name))
-      else:
-          sections['20-30th percentile'].append((percentile, value, name))
+def render_dAPM(player):
+   #Written by the nightly posterior_updates job; nothing to show until it has run
+   if not os.path.exists("pages/data/dAPM.csv"):
+      return
 
-  traces = []
-  for section_name, section_data in sections.items():
-      percentiles, values, names = zip(*section_data)
-      trace = go.Scatter(
-          x=percentiles,
-          y=values,
-          mode='markers',
-          text=names,
-          marker=dict(
-              size=10,
-              opacity=0.7,
-              line=dict(width=1),
-          ),
-          name=section_name
-      )
-      traces.append(trace)
+   player_id = player["id"].tolist()[0]
+   dAPM_data = load_table("dAPM")
+   with st.expander('Decayed Adjusted Plus-Minus (updated nightly)', expanded=False):
+      st.markdown("**dAPM**")
+      st.text("Exponentially weighted plus-minus per game, adjusted for the final margin. Points per game, not the bWPM scale.")
+      percentile, mean, ci_lower, ci_upper = compute_dAPM(player_id)
+      if len(mean) > 0:
+        st.code("Percentile: " + str(percentile.iloc[0]))
+        st.code("Points per game: " + str(mean.iloc[0]))
 
-  layout = go.Layout(
-      title='League-wide ' + stat_name,
-      xaxis=dict(title='Percentile Range'),
-      yaxis=dict(title=stat_name),
-      showlegend=True,
-  )
+        out = {
+          "95% CI Lower Bound": [ci_lower.iloc[0]],
+          "Posterior Mean": [mean.iloc[0]],
+          "95% CI Upper Bound": [ci_upper.iloc[0]]
+        }
 
-  fig = go.Figure(data=traces, layout=layout)
+        st.table(pd.DataFrame(out))
+      else:
+         st.text("dAPM only available for players in the top 200 minutes per game played this season.")
 
-  st.plotly_chart(fig, use_container_width=True)
+      render_percentile_plot("dAPM", get_table_version("dAPM"), dAPM_data["MEAN"].tolist(), dAPM_data["PLAYER_NAME"].tolist(), stat_name="dAPM", percentiles=dAPM_data["PERCENTILE"].tolist(), drop_lowest=False)
 
 def render_tORNG(team_abbrev):
   with st.expander("Topological Offensive Range", expanded=True):
-    tRNG_df = pd.read_csv("pages/data/PERSISTENCE_MEANS.csv")
+    tRNG_df = load_table("PERSISTENCE_MEANS")
     values = tRNG_df["OFF_MEAN_H0_DEATH"].tolist()
     team_abbrevs = tRNG_df["abbreviation_x"].tolist()
-    percentiles = [stats.percentileofscore(values, value) for value in values]
+    percentiles = compute_percentiles(values)
     st.markdown("**tORNG**")
     try:
       team_dict = get_nba_teams()
-      off_val = tRNG_df[tRNG_df["abbreviation_x"] == team_abbrev]["OFF_MEAN_H0_DEATH"]
+      off_val = lookup_team("PERSISTENCE_MEANS", team_abbrev)["OFF_MEAN_H0_DEATH"]
       st.code("Percentile: " + str(percentiles[team_abbrevs.index(team_abbrev)]))
       st.code("Raw Score: " + str(off_val.iloc[0]))
-      render_tRNG_leaguewide_plot(tRNG_df["OFF_MEAN_H0_DEATH"].tolist(), tRNG_df["abbreviation_x"].tolist(), stat_name = "tORG")
+      render_percentile_plot("tORNG", get_table_version("PERSISTENCE_MEANS"), tRNG_df["OFF_MEAN_H0_DEATH"].tolist(), tRNG_df["abbreviation_x"].tolist(), stat_name="tORG")
     except:
       st.code("Error in computation. Reporting bug. ")
 
 def render_tDRNG(team_abbrev):
   with st.expander("Topological Defensive Range", expanded=True):
-    tRNG_df = pd.read_csv("pages/data/PERSISTENCE_MEANS.csv")
+    tRNG_df = load_table("PERSISTENCE_MEANS")
     values = tRNG_df["DEF_MEAN_H0_DEATH"].tolist()
     team_abbrevs = tRNG_df["abbreviation_x"].tolist()
-    percentiles = [stats.percentileofscore(values, value) for value in values]
+    percentiles = compute_percentiles(values)
     st.markdown("**tDRNG**")
     try:
       team_dict = get_nba_teams()
-      off_val = tRNG_df[tRNG_df["abbreviation_x"] == team_abbrev]["DEF_MEAN_H0_DEATH"]
+      off_val = lookup_team("PERSISTENCE_MEANS", team_abbrev)["DEF_MEAN_H0_DEATH"]
       st.code("Percentile: " + str(percentiles[team_abbrevs.index(team_abbrev)]))
       st.code("Raw Score: " + str(off_val.iloc[0]))
-      render_tRNG_leaguewide_plot(tRNG_df["DEF_MEAN_H0_DEATH"].tolist(), tRNG_df["abbreviation_x"].tolist(), stat_name="tDRNG")
+      render_percentile_plot("tDRNG", get_table_version("PERSISTENCE_MEANS"), tRNG_df["DEF_MEAN_H0_DEATH"].tolist(), tRNG_df["abbreviation_x"].tolist(), stat_name="tDRNG")
     except:
       st.code("Error in computation. Reporting bug. ")
 
 def render_tNRNG(team_abbrev):
   with st.expander("Topological Net Range", expanded=True):
-    tRNG_df = pd.read_csv("pages/data/PERSISTENCE_MEANS.csv")
+    tRNG_df = load_table("PERSISTENCE_MEANS")
     values = tRNG_df["NET_MEAN_H0_DEATH"].tolist()
     team_abbrevs = tRNG_df["abbreviation_x"].tolist()
-    percentiles = [stats.percentileofscore(values, value) for value in values]
+    percentiles = compute_percentiles(values)
     st.markdown("**tNRNG**")
     try:
       team_dict = get_nba_teams()
-      off_val = tRNG_df[tRNG_df["abbreviation_x"] == team_abbrev]["NET_MEAN_H0_DEATH"]
+      off_val = lookup_team("PERSISTENCE_MEANS", team_abbrev)["NET_MEAN_H0_DEATH"]
       st.code("Percentile: " + str(percentiles[team_abbrevs.index(team_abbrev)]))
       st.code("Raw Score: " + str(off_val.iloc[0]))
-      render_tRNG_leaguewide_plot(tRNG_df["NET_MEAN_H0_DEATH"].tolist(), tRNG_df["abbreviation_x"].tolist(), stat_name="tNRNG")
+      render_percentile_plot("tNRNG", get_table_version("PERSISTENCE_MEANS"), tRNG_df["NET_MEAN_H0_DEATH"].tolist(), tRNG_df["abbreviation_x"].tolist(), stat_name="tNRNG")
     except:
       st.code("Error in computation. Reporting bug. ")
 
 def render_dvr3P():
     with st.expander("Distance-Volume Robust Three Point Percentage", expanded=True):
       st.markdown("**dvr3P**")
-      data = pd.read_csv("pages/data/dvr3P.csv")
+      data = load_table("dvr3P")
       render_explore_dvr3P = st.toggle("Explore Data", value=False, key=10)
       if render_explore_dvr3P:
           renderer = get_pyg_renderer("pages/data/dvr3P.csv")
           renderer.render_explore()
         
-      render_dvr3P_leaguewide_plot(data["CombinedEstimate"].tolist(), data["OPLAYER_FULL_NAME"].tolist())
+      render_percentile_plot("dvr3P", get_table_version("dvr3P"), data["CombinedEstimate"].tolist(), data["OPLAYER_FULL_NAME"].tolist(), stat_name="dvr3P%")
 
          
 
@@ -0,0 +1,158 @@
+import numpy as np
+import streamlit as st
+import plotly.graph_objs as go
+
+from pages.src.hex_bins import EXTENT, GRIDSIZE, Y_OFFSET, get_grid, get_hex_centers, get_hex_pcts, bin_shot_sets
+from pages.src.lineup_shot_tiles import ATTEMPTS, MAKES
+
+#Half-court shot charts drawn in the browser by Plotly. The court is a fixed set of layout shapes built
+#once per process; each chart only adds one trace with the coordinates and values of the hexes (or shots)
+#it shows, so a render is a few hundred numbers of JSON and no image work on the server.
+
+COURT_COLOR = "white"
+BACKGROUND_COLOR = "black"
+#Pixels per court unit; fixed so hex markers line up with the grid
+CHART_SCALE = 0.9
+
+def court_line(x0, y0, x1, y1, width=2, color=COURT_COLOR):
+    return dict(type="line", x0=x0, y0=y0, x1=x1, y1=y1, line=dict(color=color, width=width), layer="above")
+
+def court_circle(x, y, radius, color=COURT_COLOR):
+    return dict(type="circle", x0=x - radius, y0=y - radius, x1=x + radius, y1=y + radius,
+                line=dict(color=color, width=2), layer="above")
+
+def court_arc(x, y, width, height, num_points=60, color=COURT_COLOR):
+    #Upper half of an ellipse as a path; Plotly paths have no arc command
+    angles = np.linspace(0, np.pi, num_points)
+    points = zip(x + width / 2 * np.cos(angles), y + height / 2 * np.sin(angles))
+    path = "M " + " L ".join(f"{px:.1f},{py:.1f}" for px, py in points)
+    return dict(type="path", path=path, line=dict(color=color, width=2), layer="above")
+
+@st.cache_resource
+def get_court_shapes():
+    return [
+        # Short corner 3PT lines
+        court_line(-220, 0, -220, 140),
+        court_line(220, 0, 220, 140),
+        # 3PT Arc
+        court_arc(0, 140, 440, 315),
+        # Lane and Key
+        court_line(-80, 0, -80, 190),
+        court_line(80, 0, 80, 190),
+        court_line(-60, 0, -60, 190),
+        court_line(60, 0, 60, 190),
+        court_line(-80, 190, 80, 190),
+        court_circle(0, 190, 60),
+        court_line(-250, 0, 250, 0, width=4),
+        # Rim
+        court_circle(0, 60, 15),
+        # Backboard
+        court_line(-30, 40, 30, 40),
+    ]
+
+def format_season(season):
+    return f"{season[0][:4]}-{season[-1][-2:]}"
+
+def get_hex_size(extent=EXTENT, gridsize=GRIDSIZE):
+    #Marker diameter in pixels of a full hex
+    return get_grid(extent, gridsize)["sx"] * CHART_SCALE
+
+def create_court(title, season=None, subtitle=None, extent=EXTENT):
+    """ Empty court figure with the title in the top left and the season in the bottom left
+    """
+    xmin, xmax, ymin, ymax = extent
+    fig = go.Figure()
+    fig.update_layout(
+        shapes=get_court_shapes(),
+        width=(xmax - xmin) * CHART_SCALE,
+        height=(ymax - ymin) * CHART_SCALE,
+        margin=dict(l=0, r=0, t=0, b=0),
+        paper_bgcolor=BACKGROUND_COLOR,
+        plot_bgcolor=BACKGROUND_COLOR,
+        showlegend=False,
+        xaxis=dict(range=[xmin, xmax], visible=False, fixedrange=True),
+        yaxis=dict(range=[ymin, ymax], visible=False, fixedrange=True, scaleanchor="x"),
+    )
+
+    fig.add_annotation(x=xmin, y=ymax, xanchor="left", yanchor="top", text=title, showarrow=False,
+                       font=dict(size=16, color=COURT_COLOR))
+    if subtitle is not None:
+        fig.add_annotation(x=xmin, y=ymax - 25, xanchor="left", yanchor="top", text=subtitle, showarrow=False,
+                           font=dict(size=12, color="red"))
+    if season is not None:
+        fig.add_annotation(x=xmin, y=-20, xanchor="left", text=format_season(season), showarrow=False,
+                           font=dict(size=11, color=COURT_COLOR))
+    return fig
+
+def add_hexes(fig, hexes, color, sizes, colorscale, colorbar, hovertemplate, customdata, cmin=None, cmax=None, cmid=None):
+    centers = get_hex_centers()[hexes]
+    fig.add_trace(go.Scatter(
+        x=centers[:, 0].round(1), y=centers[:, 1].round(1), mode="markers",
+        marker=dict(symbol="hexagon", size=sizes, color=color, colorscale=colorscale, cmin=cmin, cmax=cmax, cmid=cmid,
+                    colorbar=colorbar, line=dict(width=0)),
+        customdata=customdata, hovertemplate=hovertemplate
+    ))
+    return fig
+
+def get_colorbar(title, **kwargs):
+    return dict(title=dict(text=title, font=dict(color=COURT_COLOR)), tickfont=dict(color=COURT_COLOR),
+                x=0.98, y=0.98, xanchor="right", yanchor="top", len=0.35, thickness=10, **kwargs)
+
+def volume_chart(tile, season=None, RA=True, mincnt=2, colorscale="Plasma"):
+    """ Shot volume per hex of a precomputed shot tile, log-scaled
+    """
+    attempts = tile[ATTEMPTS]
+    shown = attempts >= mincnt
+    if RA == True:
+        fig = create_court("Shot Volume", season)
+    else:
+        centers = get_hex_centers()
+        x, y = centers[:, 0], centers[:, 1] - Y_OFFSET
+        shown &= ~((-45 < x) & (x < 45) & (-40 < y) & (y < 45))
+        fig = create_court("Shot Volume", season, subtitle="(w/o restricted area)")
+
+    #Log color scale, labelled in attempts
+    ticks = [value for value in [2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000] if value <= max(attempts.max(), mincnt)]
+    hexes = np.flatnonzero(shown)
+    return add_hexes(fig, hexes, np.log10(attempts[hexes]).round(3), get_hex_size(), colorscale,
+                     get_colorbar("FGA", tickvals=np.log10(ticks), ticktext=ticks),
+                     "%{customdata} FGA<extra></extra>", attempts[hexes])
+
+def frequency_chart(df, season=None, filter_threshold=5, colorscale="Viridis"):
+    """ Shot frequency (hex size) and accuracy (color) from a shot chart frame
+    """
+    attempts, makes, pcts = bin_shot_sets([df], min_attempts=filter_threshold)
+    attempts, pcts = attempts[0], pcts[0]
+    hexes = np.flatnonzero(attempts > 0)
+    sizes = np.sqrt(attempts[hexes] / attempts.max()) * get_hex_size()
+
+    fig = create_court("Frequency and FG%", season)
+    return add_hexes(fig, hexes, (pcts[hexes] * 100).round(1), sizes.round(1), colorscale,
+                     get_colorbar("Shot %", ticksuffix="%"),
+                     "%{customdata[0]} FGA, %{customdata[1]:.1f}%<extra></extra>",
+                     np.column_stack([attempts[hexes], (pcts[hexes] * 100).round(1)]))
+
+def comparison_chart(tile, league_tile, season=None, filter_threshold=5, colorscale="RdBu_r"):
+    """ Shot frequency per hex, colored by FG% above or below the league's FG% from the same hex
+    """
+    attempts, makes = tile[ATTEMPTS], tile[MAKES]
+    hexes = np.flatnonzero(attempts >= filter_threshold)
+    pct_diff = ((get_hex_pcts(attempts, makes) - get_hex_pcts(league_tile[ATTEMPTS], league_tile[MAKES]))[hexes] * 100).round(1)
+    sizes = np.sqrt(attempts[hexes] / max(attempts.max(), 1)) * get_hex_size()
+
+    fig = create_court("FG% vs. League", season)
+    return add_hexes(fig, hexes, pct_diff, sizes.round(1), colorscale,
+                     get_colorbar("vs. Lg FG%", ticksuffix="%"),
+                     "%{customdata[0]} FGA, %{customdata[1]:+.1f}% vs. league<extra></extra>",
+                     np.column_stack([attempts[hexes], pct_diff]), cmin=-20, cmax=20, cmid=0)
+
+def makes_misses_chart(df, season=None):
+    """ Every shot in a shot chart frame, green for makes and red for misses
+    """
+    fig = create_court("<span style='color:red'>Misses</span> & <span style='color:green'>Buckets</span>", season)
+    fig.add_trace(go.Scatter(
+        x=df["LOC_X"].to_numpy(), y=df["LOC_Y"].to_numpy() + Y_OFFSET, mode="markers",
+        marker=dict(size=5, color=df["SHOT_MADE_FLAG"].to_numpy(), colorscale="RdYlGn", cmin=0, cmax=1),
+        hoverinfo="skip"
+    ))
+    return fig
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from nba_api.library.http import NBAResponse
+from nba_api.stats.library.http import NBAStatsResponse
+
+#Every nba_api request in the app goes through fetch(), which keeps the raw responses in a sqlite file
+#so they survive restarts and are shared between server workers
+cache_dir = "pages/cache/"
+cache_path = cache_dir + "nba_api_cache.sqlite"
+
+CURRENT_SEASON = "2023-24"
+
+#TTL classes, in seconds (None never expires)
+TTL_HISTORICAL = None
+TTL_CURRENT = 60 * 60
+TTL_LIVE = 5
+
+#stats.nba.com starts dropping connections above a few requests per second, so every
+#network request (from any thread) waits its turn behind this limiter
+MIN_REQUEST_INTERVAL = 0.25
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0
+
+#Endpoint arguments that don't change the response
+ignored_params = ["proxy", "headers", "timeout", "get_request"]
+
+_connection_lock = threading.Lock()
+_connection = None
+
+_rate_limit_lock = threading.Lock()
+_last_request_time = 0.0
+
+def get_connection():
+    #One connection shared by every thread; callers hold _connection_lock while using it
+    global _connection
+    if _connection is None:
+        os.makedirs(cache_dir, exist_ok=True)
+        _connection = sqlite3.connect(cache_path, timeout=30, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, endpoint TEXT, params TEXT, url TEXT, response TEXT, fetched_at REAL)"
+        )
+    return _connection
+
+def is_live_endpoint(endpoint):
+    return endpoint.__module__.startswith("nba_api.live")
+
+def normalize_params(endpoint, args, kwargs):
+    #Bind positional args to their names and fill in defaults so equivalent calls share a key
+    bound = inspect.signature(endpoint).bind_partial(*args, **kwargs)
+    bound.apply_defaults()
+    return {name: str(value) for name, value in sorted(bound.arguments.items()) if name not in ignored_params}
+
+def get_endpoint_name(endpoint):
+    return endpoint.__module__ + "." + endpoint.__name__
+
+def get_cache_key(endpoint, params):
+    raw = get_endpoint_name(endpoint) + json.dumps(params, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def is_historical_season(season):
+    #Season strings are formatted as YYYY-YY, so they sort chronologically
+    return season < CURRENT_SEASON
+
+def get_ttl(endpoint, params):
+    if is_live_endpoint(endpoint):
+        return TTL_LIVE
+
+    season = params.get("season")
+    if season and is_historical_season(season):
+        return TTL_HISTORICAL
+
+    return TTL_CURRENT
+
+def read_cached_response(key, ttl):
+    with _connection_lock:
+        row = get_connection().execute("SELECT url, response, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+
+    url, response, fetched_at = row
+    if ttl is not None and time.time() - fetched_at > ttl:
+        return None
+
+    return url, response
+
+def write_cached_response(key, endpoint, params, url, response):
+    with _connection_lock:
+        conn = get_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, endpoint, params, url, response, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, get_endpoint_name(endpoint), json.dumps(params, sort_keys=True), url, response, time.time())
+        )
+        conn.commit()
+
+def wait_for_rate_limit():
+    global _last_request_time
+    with _rate_limit_lock:
+        wait = _last_request_time + MIN_REQUEST_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request_time = time.monotonic()
+
+def request_endpoint(endpoint, args, kwargs, retries):
+    #Retry with exponential backoff; stats.nba.com times out intermittently
+    for attempt in range(retries + 1):
+        wait_for_rate_limit()
+        try:
+            return endpoint(*args, **kwargs)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+def build_endpoint(endpoint, args, kwargs, url, response):
+    #Rebuild the endpoint object from a stored response without hitting the network
+    data = endpoint(*args, **kwargs, get_request=False)
+    response_class = NBAResponse if is_live_endpoint(endpoint) else NBAStatsResponse
+    data.nba_response = response_class(response=response, status_code=200, url=url)
+    data.load_response()
+    return data
+
+#Drop-in replacement for calling an nba_api endpoint class, e.g. fetch(playergamelog.PlayerGameLog, player_id=..., season=...)
+def fetch(endpoint, *args, ttl="auto", retries=0, **kwargs):
+    params = normalize_params(endpoint, args, kwargs)
+    if ttl == "auto":
+        ttl = get_ttl(endpoint, params)
+    key = get_cache_key(endpoint, params)
+
+    cached = read_cached_response(key, ttl)
+    if cached is not None:
+        url, response = cached
+        return build_endpoint(endpoint, args, kwargs, url, response)
+
+    data = request_endpoint(endpoint, args, kwargs, retries)
+    if data.nba_response.valid_json():
+        write_cached_response(key, endpoint, params, data.nba_response.get_url(), data.nba_response.get_response())
+
+    return data
+
+#Fetch the same endpoint for a list of parameter dicts (e.g. one per season) in parallel.
+#Results come back in the same order as param_list
+def fetch_many(endpoint, param_list, ttl="auto", retries=MAX_RETRIES, max_workers=MAX_WORKERS):
+    if len(param_list) == 0:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(param_list))) as executor:
+        futures = [executor.submit(fetch, endpoint, ttl=ttl, retries=retries, **params) for params in param_list]
+        return [future.result() for future in futures]
+
+def clear_cache(endpoint=None):
+    with _connection_lock:
+        conn = get_connection()
+        if endpoint is None:
+            conn.execute("DELETE FROM responses")
+        else:
+            conn.execute("DELETE FROM responses WHERE endpoint = ?", (get_endpoint_name(endpoint),))
+        conn.commit()
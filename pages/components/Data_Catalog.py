@@ -0,0 +1,123 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+import streamlit as st
+
+#Reference data in pages/data, loaded once per version of each CSV. Each CSV is converted to a typed,
+#uncompressed Arrow file the first time it's read (and again whenever the CSV changes); after that it's
+#memory-mapped, and numeric columns are views of the mapped file rather than copies.
+#Tables are addressed by file stem, e.g. load_table("b3P") for pages/data/b3P.csv.
+
+data_dir = "pages/data/"
+columnar_dir = "pages/cache/catalog/"
+
+#Columns used for indexed lookups, in order of preference
+player_id_columns = ["PLAYER_ID", "player_id", "nba_id"]
+team_columns = ["TEAM_ABBREVIATION", "abbreviation_x", "team", "Tm", "TEAM"]
+
+#Text columns with these in their name are names/teams and become categoricals regardless of cardinality
+category_keywords = ["NAME", "PLAYER", "TEAM", "ABBREVIATION", "TM", "MATCHUP", "CARD"]
+
+def get_table_names():
+    return sorted(f[:-4] for f in os.listdir(data_dir) if f.endswith(".csv"))
+
+def get_csv_path(name):
+    return data_dir + name + ".csv"
+
+def get_columnar_path(name):
+    return columnar_dir + name + ".arrow"
+
+def is_text_column(values):
+    return pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+
+def optimize_dtypes(df):
+    #Saved index columns from to_csv carry no information
+    df = df.drop(columns=[column for column in df.columns if str(column).startswith("Unnamed:")])
+
+    #Floats keep float64: metric columns are displayed as stored
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_bool_dtype(values):
+            continue
+        elif pd.api.types.is_integer_dtype(values):
+            #int32 covers every player/team/game ID; wider values stay int64
+            if values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max:
+                df[column] = values.astype(np.int32)
+        elif is_text_column(values):
+            is_name_column = any(keyword in str(column).upper() for keyword in category_keywords)
+            if is_name_column or values.nunique() <= len(values) / 2:
+                df[column] = values.astype("category")
+
+    return df
+
+def build_columnar(name):
+    os.makedirs(columnar_dir, exist_ok=True)
+    df = optimize_dtypes(pd.read_csv(get_csv_path(name), encoding="utf-8-sig"))
+    #Uncompressed, so reads map the file instead of decompressing it onto the heap
+    feather.write_feather(df, get_columnar_path(name), compression="uncompressed")
+
+def is_columnar_stale(name):
+    columnar_path = get_columnar_path(name)
+    return not os.path.exists(columnar_path) or os.path.getmtime(columnar_path) < os.path.getmtime(get_csv_path(name))
+
+#Loaded tables by name, each holding only its current version: (version, table). A rebuilt CSV replaces
+#its entry, so older memory-mapped versions are released instead of piling up in a long-running server.
+@st.cache_resource
+def get_table_store():
+    return {}
+
+def load_table_version(name, version):
+    store = get_table_store()
+    if name in store and store[name][0] == version:
+        return store[name][1]
+
+    if is_columnar_stale(name):
+        build_columnar(name)
+    #One block per column lets numeric columns without nulls stay zero-copy views of the mapped file
+    table = feather.read_table(get_columnar_path(name), memory_map=True).to_pandas(split_blocks=True)
+    store[name] = (version, table)
+    return table
+
+def load_table(name):
+    #A CSV rewritten while the app runs (nightly posteriors, kORTG updates) is picked up on the next call
+    return load_table_version(name, get_table_version(name))
+
+#Version of the CSV on disk, for caches keyed on (dataset, version)
+def get_table_version(name):
+    return os.path.getmtime(get_csv_path(name))
+
+def load_catalog():
+    return {name: load_table(name) for name in get_table_names()}
+
+#Indexed copies by (name, column), replaced the same way as the tables they index
+@st.cache_resource
+def get_indexed_table_store():
+    return {}
+
+def get_indexed_table(name, column):
+    store = get_indexed_table_store()
+    version = get_table_version(name)
+    if (name, column) not in store or store[(name, column)][0] != version:
+        store[(name, column)] = (version, load_table_version(name, version).set_index(column, drop=False))
+    return store[(name, column)][1]
+
+def find_column(name, candidates):
+    columns = load_table(name).columns
+    for column in candidates:
+        if column in columns:
+            return column
+    raise KeyError(name + " has none of the columns " + str(candidates))
+
+def lookup(name, column, key):
+    #Rows of the table whose `column` equals key (empty frame if none), via a hashed index
+    table = get_indexed_table(name, column)
+    if key in table.index:
+        return table.loc[[key]]
+    return table.iloc[0:0]
+
+def lookup_player(name, player_id):
+    return lookup(name, find_column(name, player_id_columns), player_id)
+
+def lookup_team(name, team_abbrev):
+    return lookup(name, find_column(name, team_columns), team_abbrev)
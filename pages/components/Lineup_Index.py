@@ -0,0 +1,100 @@
+import ast
+from itertools import islice
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pages.components.Data_Catalog import load_table
+from pages.components.Player_Index import get_player_names
+
+#Lineup search index over a lineup evaluation table, built once per process. Every player has a bitset
+#(a Python int) of the lineups they're in, with bit i standing for the i-th best lineup by E_VAL_PER_MIN.
+#"Lineups with A and B" is the AND of two bitsets, and walking the result from the lowest bit up gives the
+#matches best first, so a top-k query stops after k lineups no matter how many seasons are loaded.
+
+lineup_table = "lineup_evals_10_min"
+player_columns = ["player_one", "player_two", "player_three", "player_four", "player_five"]
+
+def parse_player_names(player_names):
+    #"('Clint Capela', \"De'Andre Hunter\", ...)" -> ("Clint Capela", "De'Andre Hunter", ...)
+    return tuple(ast.literal_eval(player_names))
+
+@st.cache_resource
+def get_lineup_index(name=lineup_table):
+    table = load_table(name)
+    player_ids = table[player_columns].to_numpy(dtype=np.int64)
+
+    #Names are parsed once per distinct tuple string, in the same order as the player ID columns
+    names_column = table["PLAYER_NAMES"].astype(str)
+    player_names = np.array(names_column.map({names: parse_player_names(names) for names in names_column.unique()}).tolist(), dtype=object)
+
+    #A few players are missing from the source data (None); fall back to the player list, then the ID
+    missing = pd.isna(player_names)
+    if missing.any():
+        fallback_names = get_player_names(player_ids[missing])
+        id_names = pd.Series(player_ids[missing]).map("Player {}".format)
+        player_names[missing] = fallback_names.fillna(id_names).to_numpy()
+
+    lineups = pd.DataFrame({
+        "LINEUP_ID": table["LINEUP_ID"].astype(str).to_numpy(),
+        "PLAYER_NAMES": [", ".join(names) for names in player_names],
+        "E_VAL_PER_MIN": table["E_VAL_PER_MIN"].to_numpy(),
+        "PTS_PER_MIN": table["PTS_PER_MIN"].to_numpy()
+    })
+
+    rank_rows = np.argsort(-lineups["E_VAL_PER_MIN"].to_numpy(), kind="stable")
+    ranks = np.empty(len(lineups), dtype=int)
+    ranks[rank_rows] = np.arange(len(lineups))
+
+    player_bits = {}
+    for player_id, rank in zip(player_ids.ravel().tolist(), np.repeat(ranks, len(player_columns)).tolist()):
+        player_bits[player_id] = player_bits.get(player_id, 0) | (1 << rank)
+
+    return {
+        "table": lineups,
+        "rank_rows": rank_rows,
+        "all_bits": (1 << len(lineups)) - 1,
+        "player_bits": player_bits,
+        "player_names": dict(zip(player_ids.ravel().tolist(), player_names.ravel().tolist())),
+        "label_to_row": dict(zip(lineups["PLAYER_NAMES"], range(len(lineups)))),
+        "id_to_row": dict(zip(lineups["LINEUP_ID"], range(len(lineups))))
+    }
+
+def get_lineup_row(lineup_id, name=lineup_table):
+    return get_lineup_index(name)["id_to_row"].get(lineup_id)
+
+def get_lineup_id_from_label(label, name=lineup_table):
+    #Lineup ID for a "Player A, Player B, ..." label, None if there's no such lineup
+    index = get_lineup_index(name)
+    row = index["label_to_row"].get(label)
+    return None if row is None else index["table"]["LINEUP_ID"].iloc[row]
+
+def get_lineup_players(name=lineup_table):
+    #{player ID: name} for everyone who appears in a lineup, sorted by name
+    return dict(sorted(get_lineup_index(name)["player_names"].items(), key=lambda player: player[1]))
+
+def get_lineup_bits(player_ids, name=lineup_table):
+    index = get_lineup_index(name)
+    bits = index["all_bits"]
+    for player_id in player_ids:
+        bits &= index["player_bits"].get(player_id, 0)
+    return bits
+
+def iter_ranks(bits):
+    #Set bits from lowest to highest, i.e. matching lineups from best to worst
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+def count_lineups(player_ids, name=lineup_table):
+    return get_lineup_bits(player_ids, name).bit_count()
+
+def find_lineups(player_ids, k=None, name=lineup_table):
+    """
+    Lineups containing every player in player_ids, best E_VAL_PER_MIN first, at most k of them
+    (all if k is None). No players means every lineup.
+    """
+    index = get_lineup_index(name)
+    ranks = list(islice(iter_ranks(get_lineup_bits(player_ids, name)), k))
+    return index["table"].iloc[index["rank_rows"][ranks]]
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from nba_api.live.nba.endpoints import scoreboard, playbyplay, boxscore
+from nba_api.live.nba.library.http import NBALiveHTTP
+from nba_api.stats.endpoints import playbyplayv3
+
+from pages.components.Data_Access import fetch, TTL_LIVE, MAX_WORKERS
+from pages.components.Player_Index import get_player_names
+from pages.src.pbp_enrichment import new_pbp_state, build_roster_index, update_pbp_state
+
+#Live game feed shared by every session in the server process. Each cdn.nba.com live-data file is
+#polled at most once per MIN_POLL_INTERVAL seconds with a conditional request (If-None-Match/If-Modified-Since),
+#so an unchanged file costs a 304 and no parsing. Per-game state keeps the enriched play-by-play and
+#the last parsed box score; a new play-by-play body only has its new actions normalized and appended.
+
+REQUEST_TIMEOUT = 10
+#The CDN isn't rate limited like stats.nba.com, so a full slate can be polled at once
+MAX_GAME_WORKERS = 4 * MAX_WORKERS
+MIN_POLL_INTERVAL = TTL_LIVE
+
+#Point the live endpoints somewhere else, e.g. a replay server (see pages/src/live_replay.py)
+if os.environ.get("NBA_LIVE_DATA_URL"):
+    NBALiveHTTP.base_url = os.environ["NBA_LIVE_DATA_URL"].rstrip("/") + "/{endpoint}"
+
+_resources_lock = threading.Lock()
+_resources = {}
+
+_games_lock = threading.Lock()
+_games = {}
+
+def get_live_url(endpoint, **kwargs):
+    return NBALiveHTTP.base_url.format(endpoint=endpoint.endpoint_url.format(**kwargs))
+
+def get_resource(url):
+    with _resources_lock:
+        if url not in _resources:
+            _resources[url] = {
+                "lock": threading.Lock(),
+                "etag": None,
+                "last_modified": None,
+                "data": None,
+                "version": 0,
+                "checked_at": 0.0,
+            }
+        return _resources[url]
+
+def send_conditional_request(resource, url):
+    headers = dict(NBALiveHTTP.headers)
+    if resource["etag"]:
+        headers["If-None-Match"] = resource["etag"]
+    if resource["last_modified"]:
+        headers["If-Modified-Since"] = resource["last_modified"]
+
+    return NBALiveHTTP.get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+
+def poll(url, min_interval=None):
+    """
+    Parsed JSON of a live-data file plus a version number that only increases when the file changed.
+    Concurrent callers for the same URL wait on one request instead of each sending their own.
+    """
+    if min_interval is None:
+        min_interval = MIN_POLL_INTERVAL
+    resource = get_resource(url)
+    with resource["lock"]:
+        if resource["data"] is not None and time.time() - resource["checked_at"] < min_interval:
+            return resource["data"], resource["version"]
+
+        try:
+            response = send_conditional_request(resource, url)
+            resource["checked_at"] = time.time()
+            if response.status_code != 304:
+                response.raise_for_status()
+                resource["data"] = json.loads(response.text)
+                resource["etag"] = response.headers.get("ETag")
+                resource["last_modified"] = response.headers.get("Last-Modified")
+                resource["version"] += 1
+        except Exception:
+            #Keep serving the last good copy through a dropped request
+            if resource["data"] is None:
+                raise
+
+        return resource["data"], resource["version"]
+
+def clear_state():
+    #Forget every polled file and game, e.g. between benchmark runs
+    with _resources_lock:
+        _resources.clear()
+    with _games_lock:
+        _games.clear()
+
+def get_game_state(game_id):
+    with _games_lock:
+        if game_id not in _games:
+            _games[game_id] = {
+                "lock": threading.Lock(),
+                "pbp": new_pbp_state(),
+                "pbp_version": 0,
+                "pbp_is_live": True,
+                "box_score": None,
+                "box_score_version": 0,
+            }
+        return _games[game_id]
+
+def poll_scoreboard():
+    #Today's games by gameId, from one request shared by every game and session
+    data, version = poll(get_live_url(scoreboard.ScoreBoard))
+    return {game["gameId"]: game for game in data["scoreboard"]["games"]}
+
+def get_scoreboard_game(game_id):
+    return poll_scoreboard().get(game_id)
+
+def parse_box_score(data):
+    game = data["game"]
+    return (
+        pd.json_normalize(game["awayTeam"]["players"]),
+        pd.json_normalize(game["homeTeam"]["players"]),
+        pd.json_normalize(game["awayTeam"]["statistics"]),
+        pd.json_normalize(game["homeTeam"]["statistics"])
+    )
+
+def poll_box_score(game_id):
+    state = get_game_state(game_id)
+    data, version = poll(get_live_url(boxscore.BoxScore, game_id=game_id))
+    with state["lock"]:
+        if version != state["box_score_version"]:
+            state["box_score"] = parse_box_score(data)
+            state["box_score_version"] = version
+        return state["box_score"]
+
+def get_roster(scoreboard_game, box_score):
+    away_players, home_players, away_statistics, home_statistics = box_score
+    return build_roster_index({
+        scoreboard_game["awayTeam"]["teamTricode"]: away_players,
+        scoreboard_game["homeTeam"]["teamTricode"]: home_players
+    })
+
+def get_new_actions(actions, last_action_number):
+    #Only actions after the last one seen are normalized into a frame
+    return pd.json_normalize([action for action in actions if action["actionNumber"] > last_action_number])
+
+def poll_play_by_play(game_id, is_active, roster):
+    """
+    Enriched play-by-play chunks for a game (see combine_actions). Live games poll the live feed; finished games are read once
+    from PlayByPlayV3, which has different action numbering, so switching feeds starts over.
+    """
+    state = get_game_state(game_id)
+    if is_active:
+        data, version = poll(get_live_url(playbyplay.PlayByPlay, game_id=game_id))
+    else:
+        data, version = None, -1
+
+    with state["lock"]:
+        if state["pbp_is_live"] != is_active:
+            state["pbp"], state["pbp_version"], state["pbp_is_live"] = new_pbp_state(), 0, is_active
+
+        if version != state["pbp_version"]:
+            if is_active:
+                new_actions = get_new_actions(data["game"]["actions"], state["pbp"]["last_action_number"])
+            else:
+                new_actions = fetch(playbyplayv3.PlayByPlayV3, game_id=game_id).get_data_frames()[0]
+            if len(new_actions) > 0:
+                update_pbp_state(state["pbp"], new_actions, roster, fallback_names=get_player_names)
+            state["pbp_version"] = version
+
+        #Chunks, not a combined frame: the poller never copies the game's whole history
+        return state["pbp"]["chunks"]
+
+def load_game(game_id):
+    #Scoreboard entry, enriched play-by-play chunks and box score frames for one game
+    scoreboard_game = get_scoreboard_game(game_id)
+    box_score = poll_box_score(game_id)
+    pbp = poll_play_by_play(game_id, scoreboard_game["gameStatusText"] != "Final", get_roster(scoreboard_game, box_score))
+
+    return (scoreboard_game, pbp) + box_score
+
+def load_games(game_ids, max_workers=MAX_GAME_WORKERS):
+    """
+    load_game for every game at once, so a full slate takes about as long as one game.
+    Returns {game_id: load_game result or the exception it raised}.
+    """
+    if len(game_ids) == 0:
+        return {}
+
+    def try_load_game(game_id):
+        try:
+            return load_game(game_id)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(game_ids))) as executor:
+        return dict(zip(game_ids, executor.map(try_load_game, game_ids)))
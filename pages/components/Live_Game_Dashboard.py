@@ -1,17 +1,18 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-from nba_api.live.nba.endpoints import scoreboard, playbyplay, boxscore
-from nba_api.stats.static import players
-from nba_api.stats.endpoints import playbyplayv3
 import plotly.express as px
+import plotly.graph_objs as go
+import plotly.io as pio
 from datetime import datetime
 import time
-from retry import retry
+
+from pages.components.Live_Poller import get_snapshot, wait_for_published, wait_for_update, wait_for_game
+from pages.src.pbp_enrichment import summarize_periods, downsample_trajectory, combine_actions
 
 def get_active_games():
     games = {}
-    data = scoreboard.ScoreBoard().games.get_dict()
+    data = load_all_scoreboard()
 
     for game in data:
         if int(game["period"]) > 0:
@@ -22,57 +23,47 @@ def get_active_games():
             games[away_team + " @ " + home_team] = game_id
     return games
 
-#Get player name given their ID
-def get_player_name_from_id(player_id):
-    player = players.find_player_by_id(player_id)
-    if player:
-        return player["full_name"]
-    else: 
-        return None
-
+#Everything below reads the background poller's latest snapshot; no session calls nba_api itself
 def load_all_scoreboard():
-    return scoreboard.ScoreBoard().games.get_dict()
+    #The first visitor after a restart waits for the poller's first pass; a failed pass raises
+    return wait_for_published()["scoreboard"]
 
+def get_live_version():
+    return get_snapshot()["version"]
+
+def wait_for_live_update(after_version):
+    return wait_for_update(after_version)["version"]
 
 #Get scoreboard data
 
 def load_scoreboard_data(game_id):
-    data = scoreboard.ScoreBoard().games.get_dict()
-    for i in data:
-        if i["gameId"] == game_id:
-            return i
+    for game in load_all_scoreboard():
+        if game["gameId"] == game_id:
+            return game
     return None
 
-#Get play by play data
-
-def load_playbyplay_data(game_id, is_active):
-    if is_active:
-        data = playbyplay.PlayByPlay(game_id).get_dict()
-        data = data["game"]["actions"]
-        data = pd.json_normalize(data)
-    else:
-        data = playbyplayv3.PlayByPlayV3(game_id).get_data_frames()[0]
-    return data
-
 #Get box score for game
 
 def load_box_score_data(game_id):
-    data = boxscore.BoxScore(game_id=game_id).get_dict()
-    away_team_players = pd.json_normalize(data["game"]["awayTeam"]["players"])
-    home_team_players = pd.json_normalize(data["game"]["homeTeam"]["players"])
+    return load_all_data(game_id)[2:]
 
-    away_team_statistics = pd.json_normalize(data["game"]["awayTeam"]["statistics"])
-    home_team_statistics = pd.json_normalize(data["game"]["homeTeam"]["statistics"])
+#The poller publishes play by play as chunks; they're combined once per game and number of actions,
+#however many sessions render it
+@st.cache_resource(max_entries=64)
+def combine_pbp(game_id, num_actions, _pbp_chunks):
+    return combine_actions(_pbp_chunks)
 
-    return away_team_players, home_team_players, away_team_statistics, home_team_statistics
+def get_pbp_data(game_id, pbp_chunks):
+    return combine_pbp(game_id, sum(len(chunk) for chunk in pbp_chunks), pbp_chunks)
 
-@retry()
+#Scoreboard entry, enriched play by play and box score for one game. Not retried: the poller already
+#retries every POLL_INTERVAL, and a session re-reading the same snapshot would only stall the page
 def load_all_data(game_id):
-    scoreboard_data = load_scoreboard_data(game_id)
-    pbp_data = load_playbyplay_data(game_id, scoreboard_data["gameStatusText"] != "Final")
-    away_team_data, home_team_data, away_team_statistics, home_team_statistics = load_box_score_data(game_id)
-
-    return scoreboard_data, pbp_data, away_team_data, home_team_data, away_team_statistics, home_team_statistics
+    game = wait_for_game(game_id)
+    if game is None:
+        raise Exception("No live data for game " + str(game_id) + " yet")
+    scoreboard_game, pbp_chunks = game[:2]
+    return (scoreboard_game, get_pbp_data(game_id, pbp_chunks)) + game[2:]
 
 def render_curr_score(scoreboard_data):
     if scoreboard_data["gameStatusText"] == "Final":
@@ -80,65 +71,103 @@ def render_curr_score(scoreboard_data):
     else: 
         st.subheader(str(scoreboard_data["awayTeam"]["score"]) + "-" + str(scoreboard_data["homeTeam"]["score"]))
 
+#Team stats shown for each game on the scoreboard wall, box score key -> column name
+wall_stats = {
+    "points": "PTS",
+    "fieldGoalsPercentage": "FG%",
+    "threePointersPercentage": "3P%",
+    "reboundsTotal": "REB",
+    "assists": "AST",
+    "turnovers": "TOV"
+}
+wall_percent_stats = ["FG%", "3P%"]
+WALL_COLUMNS = 3
+
+def get_wall_stats(scoreboard_games, games):
+    #Key team stats for every game on the wall in one frame, away team first
+    team_stats = []
+    for game in scoreboard_games:
+        away_team_statistics, home_team_statistics = games[game["gameId"]][4:6]
+        team_stats.append(away_team_statistics.assign(GAME_ID=game["gameId"], TEAM=game["awayTeam"]["teamTricode"]))
+        team_stats.append(home_team_statistics.assign(GAME_ID=game["gameId"], TEAM=game["homeTeam"]["teamTricode"]))
+
+    stats = pd.concat(team_stats, ignore_index=True)
+    stats = stats[["GAME_ID", "TEAM"] + list(wall_stats.keys())].rename(columns=wall_stats)
+    stats[wall_percent_stats] = (stats[wall_percent_stats].astype(float) * 100).round(1)
+
+    return {game_id: game_stats.drop(columns="GAME_ID").set_index("TEAM") for game_id, game_stats in stats.groupby("GAME_ID", sort=False)}
+
+def render_scoreboard_wall():
+    #Every game that has tipped off, from one snapshot; the poller already fetched all box scores concurrently
+    snapshot = wait_for_published()
+    scoreboard_games = [game for game in snapshot["scoreboard"] if game["gameId"] in snapshot["games"]]
+    if len(scoreboard_games) == 0:
+        st.subheader("No active games")
+        return
+
+    stats = get_wall_stats(scoreboard_games, snapshot["games"])
+    for start in range(0, len(scoreboard_games), WALL_COLUMNS):
+        cols = st.columns(WALL_COLUMNS)
+        for col, game in zip(cols, scoreboard_games[start:start + WALL_COLUMNS]):
+            with col:
+                with st.container(border=True):
+                    st.markdown("**" + game["awayTeam"]["teamTricode"] + " @ " + game["homeTeam"]["teamTricode"] + "**")
+                    render_curr_score(game)
+                    st.caption(game["gameStatusText"])
+                    st.dataframe(stats[game["gameId"]], use_container_width=True)
+
+#Keyed on the game's last action, so reruns with no new plays reuse the summary
+@st.cache_data(max_entries=64)
+def get_period_summary(game_id, is_final, last_action, _pbp_data):
+    return summarize_periods(_pbp_data)
+
+def format_period_margin(margin, away_tricode):
+    if margin == 0:
+        return "**Tie**"
+    elif margin < 0:
+        return "**" + str(margin) + " for " + away_tricode + "**"
+    return "**+" + str(margin) + " for " + away_tricode + "**"
+
+#A finished period's last action never changes, so its chart is built once and then served from cache
+@st.cache_data(max_entries=256)
+def build_period_figure(game_id, is_final, period, last_action, away_tricode, home_tricode, title, _period_data):
+    trajectory = downsample_trajectory(_period_data)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=trajectory["actionNumber"], y=trajectory["scoreAway"], mode="markers", name=away_tricode))
+    fig.add_trace(go.Scatter(x=trajectory["actionNumber"], y=trajectory["scoreHome"], mode="markers", name=home_tricode))
+    fig.update_layout(title=title, xaxis_title="Action Number", yaxis_title="Score")
+
+    return fig.to_json()
+
 def render_score_breakdown(pbp_data, scoreboard_data):
-    print(scoreboard_data)
+    game_id = scoreboard_data["gameId"]
+    is_final = scoreboard_data["gameStatusText"] == "Final"
+    away_tricode = scoreboard_data["awayTeam"]["teamTricode"]
+    home_tricode = scoreboard_data["homeTeam"]["teamTricode"]
+    summary = get_period_summary(game_id, is_final, int(pbp_data["actionNumber"].iloc[-1]), pbp_data)
+
     with st.expander("Score Breakdown", expanded=True):
         #Separate page into columns, one for each quarter score plot
-        cols = st.columns(len(np.unique(pbp_data["period"])))
-        
-        for i in range(len(cols)):
-            with cols[i]:
-                #Collect last score from each period
-                period_data = pbp_data[pbp_data["period"] == np.unique(pbp_data["period"])[i]]
-                period_last_row = pbp_data[pbp_data["period"] == np.unique(pbp_data["period"])[i]].iloc[-1]
-                period_last_score = str(period_last_row["scoreAway"]) + "-" + str(period_last_row["scoreHome"])
-
-                #Get margin for each period
-                period_margin = str(int(period_last_row["scoreAway"]) - int(period_last_row["scoreHome"]))
-                if int(period_margin) == 0:
-                    period_margin = "**Tie**"
-                elif int(period_margin) < 0:
-                    period_margin = "**" + period_margin + " for " + scoreboard_data["awayTeam"]["teamTricode"] + "**"
-                elif int(period_margin) > 0:
-                    period_margin = "**+" + period_margin + " for " + scoreboard_data["awayTeam"]["teamTricode"] + "**"
-
-                score_string = (period_last_score + ", " + period_margin)
-
-                #Plot scores
-                scoreboard_plot = px.scatter(
-                    pbp_data[pbp_data["period"] == np.unique(pbp_data["period"])[i]], 
-                    x="actionNumber", 
-                    y=["scoreAway", "scoreHome"],
-                    title="Quarter " + str(np.unique(pbp_data["period"])[i]) + ", " + period_margin,
-                    labels = {
-                        "actionNumber": "Action Number",
-                        "value": "Score"
-                    }
-                )
-
-                newnames = {
-                    "scoreAway": scoreboard_data["awayTeam"]["teamTricode"],
-                    "scoreHome": scoreboard_data["homeTeam"]["teamTricode"]
-                }
-
-                scoreboard_plot.for_each_trace(lambda t: t.update(name = newnames[t.name],
-                                        legendgroup = newnames[t.name],
-                                        hovertemplate = t.hovertemplate.replace(t.name, newnames[t.name])
-                                        )
-                    )
-                st.plotly_chart(scoreboard_plot, use_container_width=True)
+        cols = st.columns(len(summary))
+
+        for col, period in zip(cols, summary.itertuples()):
+            with col:
+                period_margin = format_period_margin(period.MARGIN, away_tricode)
+                title = "Quarter " + str(period.PERIOD) + ", " + period_margin
+                fig_json = build_period_figure(game_id, is_final, period.PERIOD, period.LAST_ACTION, away_tricode, home_tricode, title,
+                                               pbp_data.iloc[period.START:period.END])
+                st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
 
 def render_pbp(pbp_data, scoreboard_data, away_team_data, home_team_data):
     #Isolate useful data
-    player_names = []
-    for index, row in pbp_data.iterrows():
-        player_names.append(get_player_name_from_id(row["personId"]))
-    pbp_data["player_name"] = player_names
-    filtered_pbp = pbp_data[["actionNumber", "period", "scoreHome", "scoreAway", "description", "shotDistance", "shotResult", "isFieldGoal", "actionType", "player_name"]]
+    filtered_pbp = pbp_data[["actionNumber", "period", "scoreHome", "scoreAway", "margin", "possession_number", "description", "shotDistance", "shotResult", "isFieldGoal", "actionType", "player_name"]]
     filtered_pbp.columns = ["Action Number", 
                             "Period", 
                             scoreboard_data["homeTeam"]["teamTricode"] + " Score",
                             scoreboard_data["awayTeam"]["teamTricode"] + " Score", 
+                            "Margin",
+                            "Possession",
                             "Description",
                             "Shot Distance",
                             "Shot Result",
@@ -0,0 +1,122 @@
+import time
+import threading
+import traceback
+import streamlit as st
+
+from pages.components.Data_Access import TTL_LIVE
+from pages.components.Live_Feed import poll_scoreboard, load_games
+
+#One background thread per server process polls the live feed for every game that has tipped off
+#and publishes an immutable snapshot. Sessions only ever read the latest snapshot, so upstream
+#requests scale with the number of games on the slate, not with the number of people watching.
+
+POLL_INTERVAL = TTL_LIVE
+#Slower schedule when no game is in progress (before tip-off, after the last final)
+IDLE_POLL_INTERVAL = 60
+#Longest a session's script blocks waiting for a new snapshot. Widget events aren't handled while it
+#waits, so it waits in short slices and reruns, however long until the poller's next pass
+UPDATE_WAIT_SLICE = 2
+
+#Scoreboard gameStatus values
+GAME_STATUS_LIVE = 2
+GAME_STATUS_FINAL = 3
+
+_snapshot_condition = threading.Condition()
+#error is None after a good pass, or the message of the exception that ended the last pass
+_snapshot = {"version": 0, "scoreboard": [], "games": {}, "updated_at": None, "error": None}
+
+def get_snapshot():
+    start_poller()
+    return _snapshot
+
+def publish_snapshot(scoreboard_games, games, error=None):
+    global _snapshot
+    with _snapshot_condition:
+        _snapshot = {
+            "version": _snapshot["version"] + 1,
+            "scoreboard": scoreboard_games,
+            "games": games,
+            "updated_at": time.time(),
+            "error": error
+        }
+        _snapshot_condition.notify_all()
+
+def publish_failure(error):
+    #Waiting sessions are woken with the error; the last good games are kept so the next pass can reuse finals
+    publish_snapshot(_snapshot["scoreboard"], _snapshot["games"], error=repr(error))
+
+def wait_for_snapshot(condition, timeout):
+    #Blocks until condition(snapshot) holds or timeout passes, and returns the latest snapshot
+    start_poller()
+    with _snapshot_condition:
+        _snapshot_condition.wait_for(lambda: condition(_snapshot), timeout=timeout)
+        return _snapshot
+
+def wait_for_update(after_version, timeout=UPDATE_WAIT_SLICE):
+    return wait_for_snapshot(lambda snapshot: snapshot["version"] > after_version, timeout)
+
+def wait_for_published(timeout=2 * POLL_INTERVAL):
+    """
+    Latest snapshot once the poller has finished a pass. Raises if that pass failed or none finished
+    within timeout, so callers show an error instead of an empty slate.
+    """
+    snapshot = wait_for_snapshot(lambda snapshot: snapshot["version"] > 0, timeout)
+    if snapshot["version"] == 0:
+        raise Exception("Live poller hasn't published in " + str(timeout) + "s")
+    if snapshot["error"] is not None:
+        raise Exception("Live poll failed: " + snapshot["error"])
+    return snapshot
+
+def wait_for_game(game_id, timeout=2 * POLL_INTERVAL):
+    #Every game that has tipped off is loaded in the same pass as the scoreboard, so there's nothing more to wait for
+    return wait_for_published(timeout)["games"].get(game_id)
+
+def is_final(game):
+    return game.get("gameStatus") == GAME_STATUS_FINAL or game["gameStatusText"] == "Final"
+
+def poll_games(previous_games):
+    scoreboard_games = list(poll_scoreboard().values())
+    games = {}
+    to_load = []
+    for game in scoreboard_games:
+        game_id = game["gameId"]
+        if int(game["period"]) == 0:
+            continue
+
+        #A game that was already final in the last snapshot won't change again
+        previous = previous_games.get(game_id)
+        if previous is not None and is_final(previous[0]) and is_final(game):
+            games[game_id] = previous
+        else:
+            to_load.append(game_id)
+
+    #Every in-progress game's box score and play-by-play are polled concurrently
+    for game_id, result in load_games(to_load).items():
+        if isinstance(result, Exception):
+            traceback.print_exception(result)
+            if game_id in previous_games:
+                games[game_id] = previous_games[game_id]
+        else:
+            games[game_id] = result
+
+    return scoreboard_games, games
+
+def run_poller():
+    while True:
+        interval = POLL_INTERVAL
+        try:
+            scoreboard_games, games = poll_games(_snapshot["games"])
+            publish_snapshot(scoreboard_games, games)
+            if not any(game.get("gameStatus") == GAME_STATUS_LIVE for game in scoreboard_games):
+                interval = IDLE_POLL_INTERVAL
+        except Exception as e:
+            traceback.print_exc()
+            publish_failure(e)
+        time.sleep(interval)
+
+#Started on first use and shared by every session for the life of the server
+@st.cache_resource
+def start_poller():
+    thread = threading.Thread(target=run_poller, name="live-poller", daemon=True)
+    thread.start()
+    return thread
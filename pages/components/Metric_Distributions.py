@@ -0,0 +1,47 @@
+import numpy as np
+import plotly.graph_objs as go
+import streamlit as st
+
+from pages.components.Data_Catalog import load_table, get_table_version
+
+#Binned distributions of a catalog table's metric columns, computed once per (table, column, version).
+#A histogram is only its bin edges and counts, and the quantiles are a fixed grid of 101 percentiles,
+#so what gets cached and sent to the chart doesn't grow with the table. Locating a value (its bin, its
+#percentile) is a binary search over those.
+
+NUM_BINS = 30
+PERCENTILES = np.linspace(0, 100, 101)
+
+@st.cache_data(max_entries=64)
+def build_distribution(name, column, version, num_bins=NUM_BINS):
+    values = load_table(name)[column].to_numpy(dtype=float)
+    values = values[~np.isnan(values)]
+
+    counts, edges = np.histogram(values, bins=num_bins)
+    return {
+        "edges": edges,
+        "counts": counts,
+        "quantiles": np.percentile(values, PERCENTILES),
+        "count": len(values)
+    }
+
+def get_distribution(name, column, num_bins=NUM_BINS):
+    return build_distribution(name, column, get_table_version(name), num_bins)
+
+def find_bin(distribution, value):
+    #Index of the bin value falls in; values outside the edges go to the first or last bin
+    return int(np.clip(np.searchsorted(distribution["edges"], value, side="right") - 1, 0, len(distribution["counts"]) - 1))
+
+def get_percentile(distribution, value):
+    #Percent of values at or below value, to the nearest percentile
+    return float(np.interp(value, distribution["quantiles"], PERCENTILES))
+
+def histogram_trace(distribution, color, name, highlight_bin=None, highlight_color=None, opacity=0.7):
+    #Pre-binned histogram as a bar trace, optionally with one bin in another color
+    edges = distribution["edges"]
+    colors = [color] * len(distribution["counts"])
+    if highlight_bin is not None:
+        colors[highlight_bin] = highlight_color
+
+    return go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=distribution["counts"], width=np.diff(edges),
+                  marker_color=colors, opacity=opacity, name=name)
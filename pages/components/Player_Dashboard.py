@@ -3,13 +3,17 @@ import numpy as np
 import pandas as pd
 from nba_api.stats.endpoints import playercareerstats, playerestimatedmetrics, playergamelog, teamplayeronoffsummary
 from nba_api.stats.endpoints import leaguehustlestatsplayer
-from nba_api.stats.static import players
 from scipy.stats import binom, norm
 import plotly.express as px
 import plotly.graph_objects as go
 import os
 import base64
 
+from pages.components.Data_Access import fetch, fetch_many
+from pages.components.Player_Index import get_player_index, get_player_id
+from pages.src.cumulative_stats import compute_moving_stats
+from pages.src.b3PT import bayesian_3pt_percentages
+
 #Compute z-score
 def compute_z_score(element, column):
     mean = column.mean()
@@ -17,42 +21,14 @@ def compute_z_score(element, column):
     z_score = (element - mean) / std_dev
     return z_score
 
-#Bayesian 3P% utils
+#Bayesian 3P% utils, the posterior is closed form (see pages/src/b3PT.py)
 def bayesian_3pt_percentage_with_credible_interval(historical_pct, current_attempts, current_made, prior_std=0.1, credible_level=0.95):
+    posterior = bayesian_3pt_percentages(historical_pct, current_attempts, current_made, prior_std=prior_std, credible_level=credible_level)
 
-    #Prior Distribution
-    prior_distribution = norm(historical_pct, prior_std)
-
-    #Likelihood Function
-    likelihood = binom(current_attempts, current_made/current_attempts)
-
-    #Update the Prior with Current Data (Posterior Distribution)
-    percentage_values = np.linspace(0, 1, 1000)  # Possible 3-point percentages
-    posterior_probabilities = likelihood.pmf(current_made) * prior_distribution.pdf(percentage_values)
-
-    # Check if the sum of posterior probabilities is very small or zero
-    sum_posterior = np.sum(posterior_probabilities)
-    if sum_posterior < 1e-8:
-        raise ValueError("Sum of posterior probabilities is too small, check your prior_std or data.")
-
-    # Normalize the posterior probabilities
-    posterior_probabilities /= sum_posterior
-
-    # Calculate the Bayesian 3-Point Percentage
-    bayesian_estimate = np.sum(percentage_values * posterior_probabilities)
-
-    # Calculate the credible interval
-    cumulative_probabilities = np.cumsum(posterior_probabilities)
-    lower_bound_idx = np.where(cumulative_probabilities >= (1 - credible_level) / 2)[0][0]
-    upper_bound_idx = np.where(cumulative_probabilities >= 1 - (1 - credible_level) / 2)[0][0]
-
-    bayesian_estimate = [bayesian_estimate]
-    lower_bound = [percentage_values[lower_bound_idx]]
-    upper_bound = [percentage_values[upper_bound_idx]]
     out = {
-        "Bayesian 3P%": bayesian_estimate,
-        "CI Lower Bound": lower_bound,
-        "CI Upper Bound": upper_bound
+        "Bayesian 3P%": posterior["mean"].tolist(),
+        "CI Lower Bound": posterior["ci_lower"].tolist(),
+        "CI Upper Bound": posterior["ci_upper"].tolist()
     }
 
     return pd.DataFrame(out)
@@ -68,47 +44,18 @@ def get_player_team(player_id, career_data):
     return latest_season if latest_season != 0 else None
 
 #Moving average util
-def get_moving_averages(df):
-    # Sort the DataFrame by 'GAME_DATE' to ensure chronological order
+def get_moving_averages(df, windows=(), ewm_spans=()):
+    #Game logs come most recent first, the stat engine expects chronological order
     df_sorted = df.iloc[::-1].reset_index(drop=True)
 
-    game_indices = []
-    three_pt_pct = []
-    fg_pct = []
-    ft_pct = []
-    total_plus_minus = []
-
-    cum_3pm, cum_3pa = 0, 0
-    cum_fgm, cum_fga = 0, 0
-    cum_ftm, cum_fta = 0, 0
-    cum_plus_minus = 0
-
-    # Iterate through the DataFrame to compute cumulative stats
-    for index, row in df_sorted.iterrows():
-        game_indices.append(index)
-        cum_3pm += row['FG3M']
-        cum_3pa += row['FG3A']
-        cum_fgm += row['FGM']
-        cum_fga += row['FGA']
-        cum_ftm += row['FTM']
-        cum_fta += row['FTA']
-        cum_plus_minus += row['PLUS_MINUS']
-
-        # Calculate and append the percentages and cumulative plus/minus
-        three_pt_pct.append(cum_3pm / cum_3pa if cum_3pa > 0 else 0)
-        fg_pct.append(cum_fgm / cum_fga if cum_fga > 0 else 0)
-        ft_pct.append(cum_ftm / cum_fta if cum_fta > 0 else 0)
-        total_plus_minus.append(cum_plus_minus)
-
-    out = {"GAME_NUMBER": game_indices, "3P_PCT": three_pt_pct, "FG_PCT": fg_pct, "FT_PCT": ft_pct, "TOTAL_PLUS_MINUS": total_plus_minus}
-    return pd.DataFrame(out)
+    return compute_moving_stats(df_sorted, windows=windows, ewm_spans=ewm_spans)
 
 def get_active_players():
-    player_dicts = players.get_active_players()
-    return [i["full_name"] for i in player_dicts]
+    player_table = get_player_index()["table"]
+    return player_table[player_table["is_active"]]["full_name"].tolist()
 
 def get_player_career_stats(player_id):
-    return playercareerstats.PlayerCareerStats(player_id=player_id).get_data_frames()[0]
+    return fetch(playercareerstats.PlayerCareerStats, player_id=player_id).get_data_frames()[0]
 
 def get_historical_3pt_percentage(career_df):
 
@@ -141,19 +88,6 @@ def get_player_3p_stats(career_df):
 
     return three_pa, three_pm
 
-    
-def get_player_id(full_name):
-    # Get all NBA players
-    nba_players = players.get_players()
-
-    # Search for the player by full name
-    player = [player for player in nba_players if player['full_name'] == full_name]
-
-    # Return the player's ID if found
-    if player:
-        return player[0]['id']
-    else:
-        return None
 
 #Get Bayesian 3P% data
 @st.cache_data
@@ -166,52 +100,88 @@ def load_bayes_data(player_name):
 
     return out
 
-#Get player ID
-@st.cache_data
-def get_player_id(full_name):
-    # Get all NBA players
-    nba_players = players.get_players()
+#Stats shown in the z-score chart, league mean/std is precomputed for each of these
+z_score_stats = [
+    "E_OFF_RATING",
+    "E_DEF_RATING",
+    "E_NET_RATING",
+    "E_AST_RATIO",
+    "E_OREB_PCT",
+    "E_DREB_PCT",
+    "E_REB_PCT",
+    "E_TOV_PCT",
+    "E_USG_PCT",
+    "E_PACE",
+]
+
+#League-wide estimated metrics, one entry per (season, season type), shared by every session
+@st.cache_resource
+def get_league_estimated_metrics_store():
+    return {}
+
+def build_league_estimated_metrics(df):
+    #Keep the table numeric and indexed by PLAYER_ID so player lookups and z-scores don't rescan it
+    table = df.set_index("PLAYER_ID")
+    for column in table.columns:
+        if column != "PLAYER_NAME":
+            #Only integer columns are downcast; float32 ratings would show as 130.399994 and skew the z-scores
+            values = pd.to_numeric(table[column], errors="coerce")
+            table[column] = pd.to_numeric(values, downcast="integer") if pd.api.types.is_integer_dtype(values) else values
+
+    return {
+        "table": table,
+        "mean": table[z_score_stats].mean(),
+        "std": table[z_score_stats].std()
+    }
 
-    # Search for the player by full name
-    player = [player for player in nba_players if player['full_name'] == full_name]
+def load_league_estimated_metrics(seasons, season_type):
+    store = get_league_estimated_metrics_store()
+    missing = [season for season in seasons if (season, season_type) not in store]
+
+    if missing:
+        responses = fetch_many(playerestimatedmetrics.PlayerEstimatedMetrics, [{"season": season, "season_type": season_type} for season in missing])
+        for season, response in zip(missing, responses):
+            store[(season, season_type)] = build_league_estimated_metrics(response.get_data_frames()[0])
+
+    return [store[(season, season_type)] for season in seasons]
 
-    # Return the player's ID if found
-    if player:
-        return player[0]['id']
-    else:
-        return None
-    
 #Load estimated metrics
-@st.cache_data
 def load_estimated_metrics_player(player_name, timespan, season_type, career_data):
     player_id = get_player_id(player_name)
     if timespan == "Career":
         seasons = np.unique(career_data["SEASON_ID"]).tolist()
-
-    
-        dfs = []
-        for season in seasons:
-            df = playerestimatedmetrics.PlayerEstimatedMetrics(season=season, season_type=season_type)
-            df = df.get_data_frames()[0]
-            for column in df.columns:
-                df[column] = df[column].astype(str)
-            df["SEASON"] = [season]*len(df)
-            dfs.append(df)
-        out = pd.concat(dfs)
-        return out[out["PLAYER_NAME"] == player_name]
     else:
-        df = playerestimatedmetrics.PlayerEstimatedMetrics(season=timespan, season_type=season_type)
-        df = df.get_data_frames()[0]
-        for column in df.columns:
-            df[column] = df[column].astype(str)
-        
-        return df[df["PLAYER_NAME"] == player_name].iloc[::-1]
+        seasons = [timespan]
+
+    rows = []
+    for season, league_metrics in zip(seasons, load_league_estimated_metrics(seasons, season_type)):
+        table = league_metrics["table"]
+        if player_id in table.index:
+            row = table.loc[[player_id]].reset_index()
+            row["SEASON"] = season
+            rows.append(row)
+
+    if len(rows) == 0:
+        return pd.DataFrame()
+    return pd.concat(rows, ignore_index=True)
+
+#Player's z-score for a stat in each season, nan for seasons they don't appear in
+def get_estimated_metrics_z_scores(player_id, stat, seasons, season_type):
+    z_scores = []
+    for league_metrics in load_league_estimated_metrics(seasons, season_type):
+        table = league_metrics["table"]
+        if player_id in table.index:
+            z_scores.append((table.at[player_id, stat] - league_metrics["mean"][stat]) / league_metrics["std"][stat])
+        else:
+            z_scores.append(np.nan)
+
+    return z_scores
 
 #Get basic stats
 @st.cache_data
 def load_basic_player_stats(player_name, per_mode):
     player_id = get_player_id(player_name)
-    career_stats = playercareerstats.PlayerCareerStats(player_id=player_id, per_mode36=per_mode)
+    career_stats = fetch(playercareerstats.PlayerCareerStats, player_id=player_id, per_mode36=per_mode)
     career_stats = career_stats.get_data_frames()[0]
 
     for column in career_stats.columns:
@@ -221,19 +191,28 @@ def load_basic_player_stats(player_name, per_mode):
 #Get player game data for moving averages and game log
 @st.cache_data
 def load_player_game_data(player_name, season, season_type="Regular Season"):
-    data = playergamelog.PlayerGameLog(player_id=get_player_id(player_name), season=season, season_type_all_star=season_type)
+    data = fetch(playergamelog.PlayerGameLog, player_id=get_player_id(player_name), season=season, season_type_all_star=season_type)
     data = data.get_data_frames()[0]
 
     return data
 
+#Game logs for several seasons at once, most recent game first like a single-season log
+@st.cache_data
+def load_player_game_data_seasons(player_name, seasons, season_type="Regular Season"):
+    player_id = get_player_id(player_name)
+    responses = fetch_many(playergamelog.PlayerGameLog, [{"player_id": player_id, "season": season, "season_type_all_star": season_type} for season in seasons])
+
+    return pd.concat([response.get_data_frames()[0] for response in responses[::-1]], ignore_index=True)
+
 @st.cache_data
 def load_on_off_data(player_id, career_data):
     team_id = get_player_team(player_id, career_data)
-    return teamplayeronoffsummary.TeamPlayerOnOffSummary(team_id).get_data_frames()
+    return fetch(teamplayeronoffsummary.TeamPlayerOnOffSummary, team_id=team_id).get_data_frames()
 
 @st.cache_data
 def load_hustle_stats(per_mode_time, season, season_type_all_star):
-    data = leaguehustlestatsplayer.LeagueHustleStatsPlayer(
+    data = fetch(
+        leaguehustlestatsplayer.LeagueHustleStatsPlayer,
         per_mode_time=per_mode_time,
         season=season,
         season_type_all_star=season_type_all_star
@@ -263,10 +242,6 @@ def render_seasonal_traditional_stats(player_name):
         else:
             st.table(data.head(5))
 
-@st.cache_data()
-def load_all_estimated_metrics(season, season_type, league_id="00"):
-    return playerestimatedmetrics.PlayerEstimatedMetrics(season=season, season_type=season_type, league_id="00").get_data_frames()[0]
-
 #Estimated metrics
 def render_estimated_metrics(player_name, career_data):
     with st.expander("Params"):
@@ -285,27 +260,10 @@ def render_estimated_metrics(player_name, career_data):
     st.table(estimated_data)
 
     st.subheader("Z-Scores")
-    z_score_stats = [
-        "E_OFF_RATING",
-        "E_DEF_RATING",
-        "E_NET_RATING",
-        "E_AST_RATIO",
-        "E_OREB_PCT",
-        "E_DREB_PCT",
-        "E_REB_PCT",
-        "E_TOV_PCT",
-        "E_USG_PCT",
-        "E_PACE",
-    ]
-
     z_score_stat = st.selectbox("Stat:", z_score_stats, index=2)
     #Calculate z-scores for each of the stats
     z_score_seasons = [i for i in timespan_options if i != "Career"]
-    z_scores = []
-    for season in z_score_seasons:
-        e_metrics_season = load_all_estimated_metrics(season=season, season_type=season_type, league_id="00")
-        player_raw_stat = e_metrics_season[e_metrics_season["PLAYER_ID"] == get_player_id(player_name)][z_score_stat].iloc[0]
-        z_scores.append(compute_z_score(player_raw_stat, e_metrics_season[z_score_stat]))
+    z_scores = get_estimated_metrics_z_scores(get_player_id(player_name), z_score_stat, z_score_seasons, season_type)
     z_score_data = pd.DataFrame({"Season": z_score_seasons, "Z-Score": z_scores})
     z_score_data["Season"] = z_score_data["Season"].astype(str)
     z_score_data["Z-Score"] = z_score_data["Z-Score"].astype(float)
@@ -337,20 +295,30 @@ def render_advanced_shooting_stats(player_name, career_data, data):
 
 #Moving averages for shooting efficiency stats and plus/minus
 def render_moving_avgs(player_name, timespan_options, curr_season_data):
+    window_options = {
+        "Cumulative": "",
+        "Last 5 games": "_LAST_5",
+        "Last 10 games": "_LAST_10",
+        "Exponentially weighted (10 games)": "_EWM_10"
+    }
     with st.expander("Params"):
         stat_type = st.selectbox("Stat:", ["FG_PCT", "3P_PCT", "FT_PCT", "TOTAL_PLUS_MINUS"], index=3)
-        averages_timespan_options = [x for x in timespan_options if x != "Career"]
-        season_moving_averages = st.selectbox("Season:", averages_timespan_options, index=len(averages_timespan_options)-1)
+        window = st.selectbox("Window:", list(window_options.keys()), index=0)
+        season_moving_averages = st.selectbox("Season:", timespan_options, index=len(timespan_options)-1)
     
     if season_moving_averages == "2023-24":
         season_game_data = curr_season_data
+    elif season_moving_averages == "Career":
+        data_load_state = st.text("Loading stats...")
+        season_game_data = load_player_game_data_seasons(player_name=player_name, seasons=[x for x in timespan_options if x != "Career"])
+        data_load_state.text("Done! Currently using cached data.")
     else:
         data_load_state = st.text("Loading stats...")
         season_game_data = load_player_game_data(player_name=player_name, season=season_moving_averages)
         data_load_state.text("Done! Currently using cached data.")
 
-    moving_average_data = get_moving_averages(season_game_data)
-    moving_avg_fig = px.line(moving_average_data, x="GAME_NUMBER", y=stat_type, markers=True)
+    moving_average_data = get_moving_averages(season_game_data, windows=(5, 10), ewm_spans=(10,))
+    moving_avg_fig = px.line(moving_average_data, x="GAME_NUMBER", y=stat_type + window_options[window], markers=True)
     st.plotly_chart(moving_avg_fig, use_container_width=True)
 
 
@@ -422,7 +390,7 @@ def load_all_data(player_name):
     player_id = get_player_id(player_name)
     bayes_data = load_bayes_data(player_name=player_name)
     season_game_data = load_player_game_data(player_name=player_name, season="2023-24")
-    career_data = playercareerstats.PlayerCareerStats(player_id=player_id).get_data_frames()[0]
+    career_data = fetch(playercareerstats.PlayerCareerStats, player_id=player_id).get_data_frames()[0]
     on_off = load_on_off_data(player_id, career_data)
     return on_off, bayes_data, season_game_data, career_data
 
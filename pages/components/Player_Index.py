@@ -0,0 +1,62 @@
+import unicodedata
+import pandas as pd
+import streamlit as st
+from nba_api.stats.static import players
+
+#Player identity index over nba_api's static player list, built once per process.
+#Every lookup is a dict access; anything that resolves a whole column of names or IDs should use
+#the vectorized helpers (get_player_names, merge_on_name) instead of looping over rows.
+
+def strip_accents(s):
+    return ''.join(c for c in unicodedata.normalize('NFD', s)
+                   if unicodedata.category(c) != 'Mn')
+
+def normalize_name(name):
+    #"Nikola Jokić", "nikola jokic " and "Nikola  Jokic" all map to the same key
+    return " ".join(strip_accents(str(name)).casefold().split())
+
+def normalize_names(names):
+    #Normalizes each distinct name once, then maps the column
+    names = pd.Series(names)
+    unique_names = pd.unique(names.dropna())
+    return names.map({name: normalize_name(name) for name in unique_names})
+
+@st.cache_resource
+def get_player_index():
+    player_table = pd.DataFrame(players.get_players())
+
+    #A few names are shared by several players; active players win, then the order nba_api lists them in
+    by_priority = player_table.sort_values("is_active", ascending=False, kind="stable")
+
+    return {
+        "table": player_table,
+        "id_to_name": dict(zip(player_table["id"], player_table["full_name"])),
+        "name_to_id": dict(zip(by_priority["full_name"][::-1], by_priority["id"][::-1])),
+        "normalized_to_id": dict(zip(normalize_names(by_priority["full_name"])[::-1], by_priority["id"][::-1]))
+    }
+
+def get_player_id(full_name):
+    index = get_player_index()
+    player_id = index["name_to_id"].get(full_name)
+    if player_id is None:
+        player_id = index["normalized_to_id"].get(normalize_name(full_name))
+    return player_id
+
+def get_player_name(player_id):
+    return get_player_index()["id_to_name"].get(player_id)
+
+def get_player_names(player_ids):
+    #Full name for every ID in a column, None where the ID isn't a known player
+    player_ids = pd.Series(player_ids)
+    names = pd.to_numeric(player_ids, errors="coerce").map(get_player_index()["id_to_name"])
+    return names.astype(object).where(names.notna(), None)
+
+def merge_on_name(left, left_on, right, right_on, how="left"):
+    """
+    Join two frames on player name, ignoring accents, case and spacing. Each name in `right` is
+    matched once (first row wins), so the result has at most one match per row of `left`.
+    """
+    right = right.assign(_NAME_KEY=normalize_names(right[right_on]).to_numpy()).drop_duplicates("_NAME_KEY").drop(columns=right_on)
+    left = left.assign(_NAME_KEY=normalize_names(left[left_on]).to_numpy())
+
+    return left.merge(right, on="_NAME_KEY", how=how).drop(columns="_NAME_KEY")
@@ -3,10 +3,14 @@ import numpy as np
 import pandas as pd
 from nba_api.stats.static import players
 from nba_api.stats.endpoints import playerestimatedmetrics
-import unicodedata
 from gekko import GEKKO
+from scipy.optimize import milp, LinearConstraint, Bounds
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import plotly.graph_objs as go
 
 from pages.components.Terminal_Redirect import *
+from pages.src.player_costs import load_player_costs, get_inputs_hash
 
 
 data_dir = "pages/data/"
@@ -33,304 +37,295 @@ def format_dollar_value(value):
         return f"{prefix}{formatted_whole}"
     
 
-"""**Calculate player costs as max of their % salary cap and comparable player % salary cap**"""
-
-def strip_accents(s):
-    return ''.join(c for c in unicodedata.normalize('NFD', s)
-                   if unicodedata.category(c) != 'Mn')
+"""**Player costs, ratings and possessions per game: precomputed by pages.src.player_costs**"""
 
 def get_all_active_players():
   active_players = pd.json_normalize(players.get_active_players())
   return active_players
 
-def get_epm_ranks(fname=data_dir + "epm_data.csv"):
-  epm_data = pd.read_csv(fname, engine="c")
-  epm_data['epm_rank'] = epm_data['epm'].rank(method='min', ascending=False).astype('int')
-  return epm_data[["nba_id", "name", "epm_rank"]]
-
-def get_pct_salary_cap(fname=data_dir + "salary_data.csv", season="2023-24", salary_cap=123000000):
-  salary_data = pd.read_csv(fname, engine="c")
-  salary_data[season] = salary_data[season].str[1:]
-  salary_data[season] = salary_data[season].str.replace(',', '', regex=False)
-  salary_data = salary_data[salary_data[season].notna()]
-  salary_data[season] = salary_data[season].astype(int)
-  salary_data["pct_salary_cap"] = salary_data[season] / salary_cap
-
-  return salary_data[["Player", "pct_salary_cap"]]
-
-def get_player_comparable_salary_cap():
-
-  epm_ranks = get_epm_ranks()
-  pct_salary_cap_data = get_pct_salary_cap()
-
-  ranks = []
-
-  for index, row in pct_salary_cap_data.iterrows():
-    try:
-      player_name = strip_accents(row["Player"])
-      epm_rank = epm_ranks[epm_ranks["name"] == player_name]["epm_rank"].iloc[0]
-      ranks.append(epm_rank)
-    except:
-      ranks.append(np.nan)
-
-  pct_salary_cap_data["epm_rank"] = ranks
-  pct_salary_cap_data = pct_salary_cap_data.dropna()
-
-  pct_salary_cap_data_sorted = pct_salary_cap_data.sort_values(by='epm_rank').reset_index(drop=True)
-
-  pct_salary_cap_data_sorted['AvgSalaryCapSurroundingCorrected'] = np.nan
-
-  for i in range(len(pct_salary_cap_data_sorted)):
-      surrounding_players = pct_salary_cap_data_sorted['pct_salary_cap'].iloc[max(i-3, 0):min(i+4, len(pct_salary_cap_data_sorted))].tolist()
-      if surrounding_players:
-          pct_salary_cap_data_sorted.at[i, 'AvgSalaryCapSurroundingCorrected'] = sum(surrounding_players) / len(surrounding_players)
-
-  return pct_salary_cap_data_sorted
-
-def get_player_costs():
-  pct_salary = get_player_comparable_salary_cap()
-  pct_salary['c'] = np.maximum(pct_salary['AvgSalaryCapSurroundingCorrected'], pct_salary['pct_salary_cap'])
-
-  return pct_salary[["Player", "c"]]
-
-@st.cache_data()
-def get_estimated_off_rating(player_names, season="2023-24"):
-  """
-  estimated_metrics = playerestimatedmetrics.PlayerEstimatedMetrics(season=season, league_id="00", season_type="Regular Season")
-  estimated_metrics = estimated_metrics.get_data_frames()[0]
-  """
-  estimated_metrics = pd.read_csv(data_dir + "e_mets.csv", engine="c")
-
-  eo = []
-  ed = []
-  for player in player_names:
-    cleaned_name = strip_accents(player)
-    e_off_rtg = estimated_metrics[estimated_metrics["PLAYER_NAME"] == cleaned_name]["E_OFF_RATING"].iloc[0]
-    e_def_rtg = estimated_metrics[estimated_metrics["PLAYER_NAME"] == cleaned_name]["E_DEF_RATING"].iloc[0]
-    eo.append(float(e_off_rtg) / 100.0)
-    ed.append(float(e_def_rtg) / 100.0)
-
-  out = {
-      "Player": player_names,
-      "eo": eo,
-      "ed": ed
-  }
-
-  return pd.DataFrame(out)
+@st.cache_resource
+def load_player_df(inputs_hash):
+    return load_player_costs()
 
-def add_eo_ed(player_costs_df, season="2023-24"):
-  e_mets_df = get_estimated_off_rating(player_costs_df["Player"].tolist(), season=season)
-
-  player_costs_df = player_costs_df.merge(e_mets_df, on="Player")
-  return player_costs_df
-
-"""**Next, calculate the number of possessions per game for players**"""
-
-def get_poss_per_game(fname=data_dir + "usage_data.csv"):
-  usage_data = pd.read_csv(fname, engine="c")
-  usage_data["poss_per_game"] = usage_data["POSS"] / usage_data["GP"]
-  return usage_data[["PLAYER", "poss_per_game"]]
-
-def add_np(player_df):
-  poss_per_game = get_poss_per_game()
-
-  np = []
-  for index, row in player_df.iterrows():
-    player_name = strip_accents(row["Player"])
-    poss_per_game_val = poss_per_game[poss_per_game["PLAYER"] == player_name]["poss_per_game"].iloc[0]
-    np.append(poss_per_game_val)
-
-  player_df["np"] = np
-  return player_df
+def get_player_df():
+    #Rebuilds the saved table only when one of its input files changed
+    return load_player_df(get_inputs_hash())
 
-"""**Finally, calculate league-wide team average possessions per game**"""
+"""**League-wide team average possessions per game**"""
 
 def calculate_league_poss_per_game(fname=data_dir + "team_possession_data.csv"):
   team_possession_data = pd.read_csv(fname, engine="c").dropna()
   team_possession_data["poss_per_game"] = team_possession_data["POSS"].str.replace(",","", regex=False).astype(int) / team_possession_data["GP"]
   return np.mean(team_possession_data["poss_per_game"])
 
-def get_player_df():
-    player_costs = get_player_costs()
-
-    player_df = add_eo_ed(player_costs)
-
-    player_df = add_np(player_df)
-
-    return player_df
-
-
 def objective_function(x, player_df):
-  pts_added = 0
-  pts_given = 0
-
-  for i in range(len(player_df)):
-    player_data = player_df.iloc[i]
+  x = np.asarray(x, dtype=float)
+  poss = player_df["np"].to_numpy(dtype=float)
 
-    term = float(player_data["eo"]) * float(player_data["np"]) * float(x[i])
-    pts_added += term
+  pts_added = (player_df["eo"].to_numpy(dtype=float) * poss * x).sum()
+  pts_given = (player_df["ed"].to_numpy(dtype=float) * poss * x).sum()
 
-    term = float(player_data["ed"]) * float(player_data["np"]) * float(x[i])
-    pts_given += term
-
-  pts_added = pts_added ** 13.91
-  pts_given = pts_given ** 13.91
+  pts_added = pts_added ** k
+  pts_given = pts_given ** k
 
   return (pts_added) / (pts_added + pts_given)
 
-def bird_eligible_array(player_df, fixed_players_indices, num_years_on_team):
-  ind = 0
-  bird_eligible = []
-  early_bird = []
-  non_bird = []
-  for index, row in player_df.iterrows():
-    if ind in fixed_players_indices:
-      num_years = num_years_on_team[fixed_players_indices.index(ind)]
-      if num_years >= 3:
-        bird_eligible.append(1)
-        early_bird.append(1)
-        non_bird.append(1)
-      elif num_years == 2:
-        bird_eligible.append(0)
-        early_bird.append(1)
-        non_bird.append(1)
-      elif num_years == 1:
-        bird_eligible.append(0)
-        early_bird.append(0)
-        non_bird.append(1)
-      else:
-        bird_eligible.append(0)
-        early_bird.append(0)
-        non_bird.append(0)
-    
-    else:
-      bird_eligible.append(0)
-      early_bird.append(0)
-      non_bird.append(0)
-    ind += 1
-  return bird_eligible, early_bird, non_bird
-  
-
+def bird_eligible_array(n, fixed_players_indices, num_years_on_team):
+  #Bird (3+ consecutive years on the team), Early Bird (2+) and Non-Bird (1+) rights of each of the n candidates
+  num_years = np.zeros(n, dtype=int)
+  num_years[list(fixed_players_indices)] = num_years_on_team
+  return (num_years >= 3).astype(int), (num_years >= 2).astype(int), (num_years >= 1).astype(int)
 
-@st.cache_resource()
-def optimize(fixed_players, available_vets, num_years_on_team, available_players, player_df, salary_cap_pct, play_time_constraint, _callback):
-    refined_player_df = player_df[player_df["Player"].isin(available_players) | player_df["Player"].isin(fixed_players) | player_df["Player"].isin(available_vets)]
-
-    refined_player_list = refined_player_df["Player"].tolist()
-    fixed_players_indices = [refined_player_list.index(i) for i in fixed_players]
-    available_vets_indices = [refined_player_list.index(i) for i in available_vets]
-    refined_player_df["b"], refined_player_df["eb"], refined_player_df["nb"] = bird_eligible_array(refined_player_df, available_vets_indices, num_years_on_team) 
-    
-
-    team_np = calculate_league_poss_per_game()
+"""**MILP engine: the win % objective solved as a sequence of linear problems**"""
 
+#pts_added**k / (pts_added**k + pts_given**k) only grows with pts_added / pts_given, so the best roster
+#is the one with the highest points ratio. Dinkelbach's method finds it by solving
+#  max (pts_added - ratio * pts_given)
+#as a MILP and setting ratio to the new roster's points ratio, until the roster stops improving it.
 
-    m = GEKKO(remote=False)
+def get_model_arrays(refined_player_df, fixed_players_indices, available_vets_indices, num_years_on_team):
+    #Everything the solvers need about the candidates, extracted once as contiguous arrays
     n = len(refined_player_df)
-    salaries = refined_player_df["c"].tolist()
-    actual_salaries = refined_player_df["s"].tolist()
-    min_eligible = refined_player_df["min_eligible"].tolist()
-    poss = refined_player_df["np"].tolist()
+    b, eb, nb = bird_eligible_array(n, available_vets_indices, num_years_on_team)
+    return {
+        "eo": refined_player_df["eo"].to_numpy(dtype=float),
+        "ed": refined_player_df["ed"].to_numpy(dtype=float),
+        "poss": refined_player_df["np"].to_numpy(dtype=float),
+        "c": refined_player_df["c"].to_numpy(dtype=float),
+        "s": refined_player_df["s"].to_numpy(dtype=float),
+        "min_eligible": refined_player_df["min_eligible"].to_numpy(dtype=float),
+        "fixed": np.isin(np.arange(n), fixed_players_indices),
+        "b": b,
+        "eb": eb,
+        "nb": nb
+    }
+
+def get_roster_constraints(c, s, min_eligible, poss, fixed, salary_cap_pct, min_team_poss=None):
+    #The GEKKO model's constraints as one LinearConstraint; fixed players are pinned by their bounds
+    not_fixed = ~fixed
+    rows = [
+        #Roster size
+        (np.ones(len(c)), 12, 15),
+        #Salary cap
+        (c * not_fixed, -np.inf, 1),
+        (c * not_fixed, -np.inf, 1.5 - s[fixed].sum()),
+        (c * not_fixed * (1 - min_eligible), -np.inf, 1),
+        #Budget and minimum salary
+        (c, 0.9, salary_cap_pct),
+    ]
+    if min_team_poss is not None:
+        #Play time
+        rows.append((poss, min_team_poss, np.inf))
+
+    return LinearConstraint(np.array([row[0] for row in rows]), [row[1] for row in rows], [row[2] for row in rows])
+
+def is_feasible(x, constraints, bounds, tol=1e-9):
+    values = constraints.A @ x
+    return bool(np.all(values >= constraints.lb - tol) and np.all(values <= constraints.ub + tol)
+                and np.all(x >= bounds.lb) and np.all(x <= bounds.ub))
+
+def solve_roster_milp(arrays, salary_cap_pct, min_team_poss=None, callback=None, initial=None, tol=1e-9, max_iterations=50):
+    """
+    0/1 selection of the candidates maximizing (1 + pts_added) / (1 + pts_given), the same points totals
+    the GEKKO model starts from 1. Raises if no roster satisfies the constraints.
+    A feasible `initial` roster (e.g. the solution of a neighbouring scenario) starts the search at its
+    ratio instead of 0, which usually leaves a single MILP to confirm it or improve on it.
+    """
+    c, fixed = arrays["c"], arrays["fixed"]
+    pts_added = arrays["eo"] * arrays["poss"]
+    pts_given = arrays["ed"] * arrays["poss"]
+    constraints = get_roster_constraints(c, arrays["s"], arrays["min_eligible"], arrays["poss"], fixed, salary_cap_pct, min_team_poss)
+    bounds = Bounds(fixed.astype(float), np.ones(len(c)))
+
+    ratio = 0.0
+    if initial is not None and is_feasible(initial, constraints, bounds):
+        ratio = (1 + pts_added @ initial) / (1 + pts_given @ initial)
+
+    for _ in range(max_iterations):
+        result = milp(-(pts_added - ratio * pts_given), integrality=np.ones(len(c)), bounds=bounds,
+                      constraints=constraints, options={"mip_rel_gap": 0})
+        if result.x is None:
+            raise Exception("No feasible roster: " + result.message)
+
+        x = np.round(result.x)
+        new_ratio = (1 + pts_added @ x) / (1 + pts_given @ x)
+        if callback is not None:
+            callback(new_ratio ** k / (new_ratio ** k + 1))
+        if new_ratio <= ratio + tol:
+            break
+        ratio = new_ratio
+
+    return x
+
+def get_roster(solution, refined_player_df):
+    roster = refined_player_df[np.round(solution) == 1.0]
 
-    #x = [m.Var(lb=0, ub=1, integer=True) for _ in range(n)]
-    #x = [m.Var(value=1 if i < 15 else 0, lb=0, ub=1, integer=True) for i in range(n)]
-    x = [m.Var(value=1 if i in fixed_players_indices else 0, lb=0, ub=1, integer=True) for i in range(n)]
+    roster_df = pd.DataFrame({
+       "Player": roster["Player"].to_numpy(),
+       "Salary Cap Percent": roster["c"].to_numpy(),
+       "Estimated offensive rating": roster["eo"].to_numpy(dtype=float) * 100.0,
+       "Estimated defensive rating": roster["ed"].to_numpy(dtype=float) * 100.0
+    })
+    
+    exp_wins = objective_function(solution, refined_player_df)
 
-    pts_added = m.Intermediate(1)
-    pts_given = m.Intermediate(1)
+    return roster_df, exp_wins
 
-    for i in range(n):
-        player_data = player_df.iloc[i]
-        eo = player_data["eo"]
-        np = player_data["np"]
-        ed = player_data["ed"]
+def solve_roster_gekko(arrays, salary_cap_pct, min_team_poss=None, callback=None, initial=None, show_output=True):
+    """
+    The MINLP roster model solved with APOPT. Every sum is built from the candidate arrays as one
+    m.sum over all players, so the model has one variable per candidate and a fixed number of equations.
+    """
+    c, s, fixed = arrays["c"], arrays["s"], arrays["fixed"]
+    m = GEKKO(remote=False)
 
-        #Intermediate terms for readability
-        term_added = m.Intermediate(eo * np * x[i])
-        term_given = m.Intermediate(ed * np * x[i])
+    #Fixed players are pinned by their lower bound; anyone else starts out of the roster unless an initial roster is given
+    start = fixed.astype(int) if initial is None else np.maximum(fixed, np.round(initial)).astype(int)
+    x = np.array([m.Var(value=value, lb=is_fixed, ub=1, integer=True) for value, is_fixed in zip(start.tolist(), fixed.astype(int).tolist())])
 
-        #Update pts_added and pts_given
-        pts_added = m.Intermediate(pts_added + term_added)
-        pts_given = m.Intermediate(pts_given + term_given)
+    pts_added = m.Intermediate(1 + m.sum(list(arrays["eo"] * arrays["poss"] * x)))
+    pts_given = m.Intermediate(1 + m.sum(list(arrays["ed"] * arrays["poss"] * x)))
 
-    pts_added_powered = m.Intermediate(pts_added**13.91)
-    pts_given_powered = m.Intermediate(pts_given**13.91)
+    pts_added_powered = m.Intermediate(pts_added**k)
+    pts_given_powered = m.Intermediate(pts_given**k)
 
     objective = pts_added_powered / (pts_added_powered + pts_given_powered)
 
     m.Maximize(objective)
 
     #Add roster size constraint
-    m.Equation(sum(x) <= 15)
-    m.Equation(sum(x) >= 12)
-
-    #Add salary cap constraint
-    salaries_var = [m.Const(value=salaries[i]) for i in range(n)]
-    m.Equation(sum([salaries_var[i] * x[i] for i in range(n) if i not in fixed_players_indices]) <= 1)
+    roster_size = m.sum(list(x))
+    m.Equation(roster_size <= 15)
+    m.Equation(roster_size >= 12)
 
     #Add salary cap constraint
-    salaries_var = [m.Const(value=salaries[i]) for i in range(n)]
-    actual_salaries_var = [m.Const(value=actual_salaries[i]) for i in range(n)]
+    new_salaries = m.sum(list((c * x)[~fixed]))
+    m.Equation(new_salaries <= 1)
+    m.Equation(new_salaries + s[fixed].sum() <= 1.5)
+    m.Equation(m.sum(list((c * (1 - arrays["min_eligible"]) * x)[~fixed])) <= 1)
+
+    #Add early bird salary constraint - require that, if player is included with early bird rights, then cost <= 1.75 * last salary.
+    #The condition x * (1 - b) * eb is only ever non-zero for early bird players, so only they get one
+    for i in np.flatnonzero(arrays["eb"] * (1 - arrays["b"])):
+        m.Equation(float(c[i]) <= m.if3(x[i], 1.75 * float(s[i]), 1e5))
+
+    #Add budget and minimum salary
+    total_salaries = m.sum(list(c * x))
+    m.Equation(total_salaries <= salary_cap_pct)
+    m.Equation(total_salaries >= .9)
+
+    if min_team_poss is not None:
+        #Add play time constraint
+        m.Equation(m.sum(list(arrays["poss"] * x)) >= min_team_poss)
 
-    all_salaries = [salaries_var[i] * x[i] for i in range(n) if (i not in fixed_players_indices)]
-    all_salaries = all_salaries + [actual_salaries_var[i] for i in fixed_players_indices]
-    m.Equation(sum(all_salaries) <= 1.5)
-    m.Equation(sum([salaries_var[i] * x[i] * (1 - min_eligible[i]) for i in range(n) if i not in fixed_players_indices]) <= 1)
+    def solve():
+        m.solve(disp=True, callback=callback)
+        return True
 
-    #Add early bird salary constraint - require that, if player is included with bird rights, then cost <= 1.75 * last salary
-    b_var = [m.Const(value=refined_player_df.iloc[i]["b"]) for i in range(n)]
-    eb_var = [m.Const(value=refined_player_df.iloc[i]["eb"]) for i in range(n)]
+    m.options.SOLVER=1
+    if not show_output:
+        #No page to write to (e.g. a sweep worker process); a failed solve raises
+        m.solve(disp=False, callback=callback)
+    #Solver output goes to the page; a failed solve is reported there and returns None
+    elif not capture_output(solve)():
+        raise Exception("No feasible roster")
 
-    for i in range(n):
-        condition = m.Intermediate(x[i] * (1 - b_var[i]) * eb_var[i])
-        #This is a trick to apply conditional constraints: we use m.max3 to ensure c[i] <= 1.75 * s[i] when condition is 1
-        #and ignore the constraint when condition is 0 by setting a high upper limit.
-        m.Equation(salaries_var[i] <= m.if3(condition, 1.75 * actual_salaries[i], 1e5))
+    return np.array([xi.value[0] for xi in x])
 
-          
-        m.Equation(sum([salaries_var[i] * x[i] for i in range(n)]) <= salary_cap_pct)
+def solve_roster(arrays, salary_cap_pct, min_team_poss=None, engine="gekko", callback=None, initial=None, show_output=True):
+    if engine == "milp":
+        return solve_roster_milp(arrays, salary_cap_pct, min_team_poss, callback=callback, initial=initial)
+    return solve_roster_gekko(arrays, salary_cap_pct, min_team_poss, callback=callback, initial=initial, show_output=show_output)
 
-    #Add minimum salary 
-    m.Equation(sum([salaries_var[i] * x[i] for i in range(n)]) >= .9)
+def get_candidates(fixed_players, available_vets, num_years_on_team, available_players, player_df):
+    refined_player_df = player_df[player_df["Player"].isin(available_players) | player_df["Player"].isin(fixed_players) | player_df["Player"].isin(available_vets)]
 
-    if play_time_constraint:
-        #Add play time constraint
-        poss_var = [m.Const(value=poss[i]) for i in range(n)]
-        m.Equation(sum([poss_var[i] * x[i] for i in range(n)]) >= 5*team_np)
+    refined_player_list = refined_player_df["Player"].tolist()
+    fixed_players_indices = [refined_player_list.index(i) for i in fixed_players]
+    available_vets_indices = [refined_player_list.index(i) for i in available_vets]
 
-    #Add fixed players constraint
-    for idx in fixed_players_indices:
-        m.Equation(x[idx] == 1)
+    return refined_player_df, get_model_arrays(refined_player_df, fixed_players_indices, available_vets_indices, num_years_on_team)
 
+@st.cache_resource()
+def optimize(fixed_players, available_vets, num_years_on_team, available_players, player_df, salary_cap_pct, play_time_constraint, _callback, engine="gekko"):
+    refined_player_df, arrays = get_candidates(fixed_players, available_vets, num_years_on_team, available_players, player_df)
 
-    m.options.SOLVER=1
-    stprint = capture_output(m.solve)
-    stprint(disp=True, callback=_callback)
-    m.solve(disp=True, callback=_callback)
-    solution = [x[i].value[0] for i in range(n)]
-
-    player_names = []
-    player_cost = []
-    player_eo = []
-    player_ed = []
-
-    for i in range(len(solution)):
-        if solution[i] == 1.0:
-            player_names.append(refined_player_df["Player"].iloc[i])
-            player_cost.append(refined_player_df["c"].iloc[i])
-            player_eo.append(float(refined_player_df["eo"].iloc[i]) * 100.0)
-            player_ed.append(float(refined_player_df["ed"].iloc[i]) * 100.0)
+    team_np = calculate_league_poss_per_game()
+    min_team_poss = 5*team_np if play_time_constraint else None
+
+    solution = solve_roster(arrays, salary_cap_pct, min_team_poss, engine, callback=_callback)
+
+    return get_roster(solution, refined_player_df)
+
+"""**Scenario sweep: the optimal roster across budgets, with and without the play time constraint**"""
+
+SWEEP_BUDGETS = np.round(np.arange(0.9, 3.0 + 1e-9, 0.1), 2)
+#Budgets per task; each task walks its budgets in increasing order, warm-starting every solve from the
+#last roster found, since a roster that fit a smaller budget still fits a bigger one
+SWEEP_CHUNK_SIZE = 4
+
+def solve_scenario_chain(arrays, scenarios, team_np, engine):
+    #Runs in a worker process, which has no Streamlit script context for solver output
+    results = []
+    previous = None
+    for salary_cap_pct, play_time_constraint in scenarios:
+        try:
+            solution = solve_roster(arrays, salary_cap_pct, 5*team_np if play_time_constraint else None, engine, initial=previous, show_output=False)
+            previous = solution
+        except Exception:
+            solution = None
+        results.append((salary_cap_pct, play_time_constraint, solution))
+    return results
+
+def get_scenario_result(salary_cap_pct, play_time_constraint, solution, refined_player_df, arrays):
+    result = {"Budget": salary_cap_pct, "Play time constraint": play_time_constraint}
+    if solution is None:
+        return result | {"Payroll": np.nan, "Expected win percent": np.nan, "Roster": None}
+
+    selected = np.round(solution) == 1.0
+    return result | {
+        "Payroll": float(arrays["c"] @ selected),
+        "Expected win percent": objective_function(solution, refined_player_df) * 100,
+        "Roster": ", ".join(refined_player_df["Player"].to_numpy()[selected])
+    }
+
+def sweep_rosters(fixed_players, available_vets, num_years_on_team, available_players, player_df, budgets=SWEEP_BUDGETS,
+                  play_time_constraints=(False, True), engine="milp", max_workers=None):
+    """
+    Optimal roster for every (budget, play time constraint) scenario, solved in a process pool. Yields one
+    result dict per scenario as soon as the task it belongs to finishes; no roster fits where Payroll is NaN.
+    """
+    refined_player_df, arrays = get_candidates(fixed_players, available_vets, num_years_on_team, available_players, player_df)
+    team_np = calculate_league_poss_per_game()
 
-    roster_df = pd.DataFrame({
-       "Player": player_names,
-       "Salary Cap Percent": player_cost,
-       "Estimated offensive rating": player_eo,
-       "Estimated defensive rating": player_ed
-    })
-    
-    exp_wins = objective_function(solution, refined_player_df)
+    chains = [
+        [(salary_cap_pct, play_time_constraint) for salary_cap_pct in budgets[i:i + SWEEP_CHUNK_SIZE]]
+        for play_time_constraint in play_time_constraints
+        for i in range(0, len(budgets), SWEEP_CHUNK_SIZE)
+    ]
 
-    return roster_df, exp_wins
+    #Forking the multi-threaded server process could hand a worker a lock held by another thread;
+    #forkserver workers start from a clean process and import solve_scenario_chain from this module
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("forkserver")) as executor:
+        futures = [executor.submit(solve_scenario_chain, arrays, chain, team_np, engine) for chain in chains]
+        for future in as_completed(futures):
+            for salary_cap_pct, play_time_constraint, solution in future.result():
+                yield get_scenario_result(salary_cap_pct, play_time_constraint, solution, refined_player_df, arrays)
+
+def frontier_chart(sweep_results):
+    #Expected win % against payroll, one line per constraint set, in budget order
+    fig = go.Figure()
+    for play_time_constraint, results in sweep_results.dropna(subset=["Payroll"]).sort_values("Budget").groupby("Play time constraint"):
+        fig.add_trace(go.Scatter(
+            x=results["Payroll"] * 100, y=results["Expected win percent"], mode="lines+markers",
+            name="Play time constraint" if play_time_constraint else "No play time constraint",
+            customdata=results[["Budget", "Roster"]].to_numpy(),
+            hovertemplate="Budget: %{customdata[0]:.2f} x cap<br>Payroll: %{x:.1f}% of cap<br>Expected win %: %{y:.1f}<br>%{customdata[1]}<extra></extra>"
+        ))
+
+    fig.update_layout(title_text="Expected win percent vs. payroll", xaxis_title="Payroll (% of salary cap)",
+                      yaxis_title="Expected win percent", showlegend=True)
+    return fig
 
 def render_inputs(player_list):
     salary_cap = 136000000
@@ -358,7 +353,7 @@ def render_inputs(player_list):
     use_free_agents = st.checkbox("Use 2024 free agents as available players", value=True)
     free_agents = pd.read_csv(data_dir + "FreeAgents.csv", engine="c")
     with st.expander("See free agents"):
-        st.dataframe(pd.read_csv(data_dir + "FreeAgents.csv", engine="c"), use_container_width=True)
+        st.dataframe(free_agents, use_container_width=True)
 
     play_time_constraint = st.checkbox("Impose playing time constraint", value=False)
     if use_free_agents:
@@ -1,6 +1,6 @@
 import streamlit as st
 import time
-from pages.components.Live_Game_Dashboard import get_active_games, load_scoreboard_data, render_curr_score, load_all_scoreboard
+from pages.components.Live_Game_Dashboard import render_curr_score, load_all_scoreboard
 from pages.components.ip import loc
 import os
 import base64
@@ -56,9 +56,10 @@ def render_svgs_horizontally(svgs, width_percentage=None, height_percentage=None
 #@retry()
 def render_sidebar_game_scores():
     st.subheader("Game Scores")
-    active_games = get_active_games()
-    for game in active_games.keys():
-        render_curr_score(load_scoreboard_data(active_games[game]))
+    #One scoreboard read for every game, rather than one per game
+    active_games = [game for game in load_all_scoreboard() if int(game["period"]) > 0]
+    for game in active_games:
+        render_curr_score(game)
     
     if len(active_games) == 0:
         st.write("No active games")
@@ -1,34 +1,135 @@
-from scipy.stats import binom, norm
-import numpy as np
-from scipy.stats import binom, norm
 import numpy as np
+import pandas as pd
+from scipy.stats import beta, rankdata
+from nba_api.stats.endpoints import leaguedashplayerstats
+
+from pages.components.Data_Access import fetch_many
+
+#Bayesian 3P% with a conjugate Beta prior. The prior is moment-matched to the player's career 3P%
+#(mean) and prior_std, so the posterior is Beta(a + makes, b + misses) and everything below is closed
+#form. All functions take scalars or arrays, so the whole league can be evaluated in one call.
+
+def beta_prior_from_moments(mean, std):
+    mean = np.clip(np.asarray(mean, dtype=float), 1e-3, 1 - 1e-3)
+    var = np.asarray(std, dtype=float) ** 2
+
+    #A Beta with this mean can't have a variance above mean * (1 - mean); fall back to a weak prior
+    concentration = np.maximum(mean * (1 - mean) / var - 1, 2.0)
+
+    return mean * concentration, (1 - mean) * concentration
+
+def beta_posterior(historical_pct, attempts, makes, prior_std=0.1):
+    prior_a, prior_b = beta_prior_from_moments(historical_pct, prior_std)
+    attempts = np.asarray(attempts, dtype=float)
+    makes = np.asarray(makes, dtype=float)
+
+    return prior_a + makes, prior_b + attempts - makes
+
+def beta_credible_interval(a, b, credible_level=0.95):
+    tail = (1 - credible_level) / 2
+    return beta.ppf(tail, a, b), beta.ppf(1 - tail, a, b)
+
+def beta_hdi(a, b, credible_level=0.95, iterations=40):
+    #The HDI is the narrowest interval holding credible_level of the mass; golden-section search
+    #over the lower tail probability, run elementwise on every posterior at once
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+
+    def width(p):
+        return beta.ppf(p + credible_level, a, b) - beta.ppf(p, a, b)
+
+    ratio = (np.sqrt(5) - 1) / 2
+    lo = np.zeros(a.shape)
+    hi = np.full(a.shape, 1 - credible_level)
+    x1 = hi - ratio * (hi - lo)
+    x2 = lo + ratio * (hi - lo)
+    w1 = width(x1)
+    w2 = width(x2)
+
+    for _ in range(iterations):
+        left = w1 < w2
+        hi = np.where(left, x2, hi)
+        lo = np.where(left, lo, x1)
+        x1, x2 = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+        w1, w2 = width(x1), width(x2)
+
+    p = (lo + hi) / 2
+    return beta.ppf(p, a, b), beta.ppf(p + credible_level, a, b)
+
+def bayesian_3pt_percentages(historical_pct, attempts, makes, prior_std=0.1, credible_level=0.95):
+    """
+    Posterior mean, 95% credible interval and 95% HDI of 3P% for arrays of players.
+    Returns a DataFrame with one row per player.
+    """
+    a, b = beta_posterior(historical_pct, attempts, makes, prior_std=prior_std)
+    ci_lower, ci_upper = beta_credible_interval(a, b, credible_level=credible_level)
+    hdi_lower, hdi_upper = beta_hdi(a, b, credible_level=credible_level)
+
+    out = {
+        "mean": np.atleast_1d(a / (a + b)),
+        "ci_lower": np.atleast_1d(ci_lower),
+        "ci_upper": np.atleast_1d(ci_upper),
+        "hdi_lower": np.atleast_1d(hdi_lower),
+        "hdi_upper": np.atleast_1d(hdi_upper)
+    }
+
+    return pd.DataFrame(out)
 
 def bayesian_3pt_percentage_with_credible_interval(historical_pct, current_attempts, current_made, prior_std=0.1, credible_level=0.95):
+    posterior = bayesian_3pt_percentages(historical_pct, current_attempts, current_made, prior_std=prior_std, credible_level=credible_level)
+
+    return posterior["mean"].iloc[0], posterior["ci_lower"].iloc[0], posterior["ci_upper"].iloc[0]
+
+def percentile_ranks(values):
+    #Share of the league strictly below each value, as an integer percentile
+    values = np.asarray(values, dtype=float)
+    return ((rankdata(values, method="min") - 1) / len(values) * 100).astype(int)
+
+def build_b3P_table(player_ids, player_names, historical_pct, attempts, makes, prior_std=0.1):
+    """
+    Rows for pages/data/b3P.csv: posterior mean, 95% HDI and league percentile for every player.
+    """
+    posterior = bayesian_3pt_percentages(historical_pct, attempts, makes, prior_std=prior_std)
+
+    out = pd.DataFrame({
+        "player_name": player_names,
+        "player_id": player_ids,
+        "mean": posterior["mean"].round(3),
+        "hdi_lower": posterior["hdi_lower"].round(3),
+        "hdi_upper": posterior["hdi_upper"].round(3)
+    })
+    out["percentile"] = percentile_ranks(posterior["mean"])
+
+    return out
+
+history_seasons = ("2018-19", "2019-20", "2020-21", "2021-22", "2022-23")
 
-    #Prior Distribution
-    prior_distribution = norm(historical_pct, prior_std)
+def load_league_player_totals(seasons):
+    #One LeagueDashPlayerStats request per season instead of one career request per player
+    responses = fetch_many(leaguedashplayerstats.LeagueDashPlayerStats, [{"season": s, "per_mode_detailed": "Totals"} for s in seasons])
+    return [response.get_data_frames()[0] for response in responses]
 
-    #Likelihood Function
-    likelihood = binom(current_attempts, current_made/current_attempts)
+def load_historical_3p(seasons=history_seasons):
+    return pd.concat(load_league_player_totals(seasons)).groupby("PLAYER_ID")[["FG3M", "FG3A"]].sum()
 
-    #Update the Prior with Current Data (Posterior Distribution)
-    percentage_values = np.linspace(0, 1, 1000)  # Possible 3-point percentages
-    posterior_probabilities = likelihood.pmf(current_made) * prior_distribution.pdf(percentage_values)
+def get_historical_pct(history, player_ids):
+    #Players without a shooting history get the league's historical 3P% as their prior mean
+    history = history.reindex(player_ids)
+    league_pct = history["FG3M"].sum() / history["FG3A"].sum()
+    return (history["FG3M"] / history["FG3A"]).fillna(league_pct).to_numpy()
 
-    # Check if the sum of posterior probabilities is very small or zero
-    sum_posterior = np.sum(posterior_probabilities)
-    if sum_posterior < 1e-8:
-        raise ValueError("Sum of posterior probabilities is too small, check your prior_std or data.")
+def load_league_3p_data(season="2023-24", history_seasons=history_seasons, num_players=200):
+    current = load_league_player_totals([season])[0]
+    current = current[current["FG3A"] > 0]
+    current = current.assign(MIN_PER_GAME=current["MIN"] / current["GP"]).nlargest(num_players, "MIN_PER_GAME")
 
-    # Normalize the posterior probabilities
-    posterior_probabilities /= sum_posterior
+    historical_pct = get_historical_pct(load_historical_3p(history_seasons), current["PLAYER_ID"])
 
-    # Calculate the Bayesian 3-Point Percentage
-    bayesian_estimate = np.sum(percentage_values * posterior_probabilities)
+    return current["PLAYER_ID"].to_numpy(), current["PLAYER_NAME"].to_numpy(), historical_pct, current["FG3A"].to_numpy(), current["FG3M"].to_numpy()
 
-    # Calculate the credible interval
-    cumulative_probabilities = np.cumsum(posterior_probabilities)
-    lower_bound_idx = np.where(cumulative_probabilities >= (1 - credible_level) / 2)[0][0]
-    upper_bound_idx = np.where(cumulative_probabilities >= 1 - (1 - credible_level) / 2)[0][0]
+def regenerate_b3P_csv(fname="pages/data/b3P.csv", season="2023-24"):
+    player_ids, player_names, historical_pct, attempts, makes = load_league_3p_data(season=season)
+    build_b3P_table(player_ids, player_names, historical_pct, attempts, makes).to_csv(fname)
 
-    return bayesian_estimate, percentage_values[lower_bound_idx], percentage_values[upper_bound_idx]
+#Run from the repo root with `python -m pages.src.b3PT`
+if __name__ == "__main__":
+    regenerate_b3P_csv()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+#Ratio stats as (made column, attempted column) and running-total stats as source column,
+#matching the columns in a PlayerGameLog frame
+ratio_stats = {
+    "3P_PCT": ("FG3M", "FG3A"),
+    "FG_PCT": ("FGM", "FGA"),
+    "FT_PCT": ("FTM", "FTA"),
+}
+
+sum_stats = {
+    "TOTAL_PLUS_MINUS": "PLUS_MINUS",
+}
+
+def safe_ratio(made, attempted):
+    #Games (or windows) with no attempts count as 0%, like the old per-game loop
+    return np.divide(made, attempted, out=np.zeros(len(made)), where=attempted > 0)
+
+def cumulative_sum(values):
+    return np.cumsum(np.asarray(values, dtype=float))
+
+def rolling_sum(values, window):
+    #Sum over the last `window` games, using fewer games at the start
+    totals = cumulative_sum(values)
+    out = totals.copy()
+    out[window:] -= totals[:-window]
+    return out
+
+def ewm_sum(values, span):
+    #Exponentially weighted running total with pandas-style span, i.e. y[t] = x[t] + (1 - alpha) * y[t-1]
+    alpha = 2.0 / (span + 1.0)
+    return lfilter([1.0], [1.0, alpha - 1.0], np.asarray(values, dtype=float))
+
+def cumulative_ratio(made, attempted):
+    return safe_ratio(cumulative_sum(made), cumulative_sum(attempted))
+
+def rolling_ratio(made, attempted, window):
+    return safe_ratio(rolling_sum(made, window), rolling_sum(attempted, window))
+
+def ewm_ratio(made, attempted, span):
+    return safe_ratio(ewm_sum(made, span), ewm_sum(attempted, span))
+
+def compute_moving_stats(games, ratio_stats=ratio_stats, sum_stats=sum_stats, windows=(), ewm_spans=()):
+    """
+    Cumulative, rolling and exponentially weighted versions of every ratio and running-total stat.
+    `games` must be in chronological order and can span any number of seasons.
+    Columns are named e.g. 3P_PCT, 3P_PCT_LAST_10 and 3P_PCT_EWM_10.
+    """
+    out = {"GAME_NUMBER": np.arange(len(games))}
+
+    for name, (made_column, attempted_column) in ratio_stats.items():
+        made = games[made_column].to_numpy(dtype=float)
+        attempted = games[attempted_column].to_numpy(dtype=float)
+
+        out[name] = cumulative_ratio(made, attempted)
+        for window in windows:
+            out[name + "_LAST_" + str(window)] = rolling_ratio(made, attempted, window)
+        for span in ewm_spans:
+            out[name + "_EWM_" + str(span)] = ewm_ratio(made, attempted, span)
+
+    for name, column in sum_stats.items():
+        values = games[column].to_numpy(dtype=float)
+
+        out[name] = cumulative_sum(values)
+        for window in windows:
+            out[name + "_LAST_" + str(window)] = rolling_sum(values, window)
+        for span in ewm_spans:
+            out[name + "_EWM_" + str(span)] = ewm_sum(values, span)
+
+    return pd.DataFrame(out)
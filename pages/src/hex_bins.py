@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+#Hexagonal grid for shot charts. The layout is the one matplotlib's hexbin uses for the same extent
+#and gridsize: two interleaved rectangular lattices, the first (nx + 1) * (ny + 1) hexes on whole grid
+#points and the other nx * ny offset by half a cell. Hex indices are stable for a given extent and
+#gridsize, so counts binned once (e.g. the precomputed lineup shot tiles) can be drawn any time later.
+
+#Half court in shot chart coordinates, with LOC_Y shifted up 60 so the rim sits at (0, 60)
+EXTENT = (-250, 250, -47.5, 422.5)
+GRIDSIZE = 25
+Y_OFFSET = 60
+
+def get_grid(extent=EXTENT, gridsize=GRIDSIZE):
+    xmin, xmax, ymin, ymax = extent
+    #Same padding as hexbin, so points on the x edges land inside the grid
+    padding = 1e-9 * (xmax - xmin)
+    xmin, xmax = xmin - padding, xmax + padding
+
+    nx = gridsize
+    ny = int(nx / np.sqrt(3))
+    return {
+        "xmin": xmin,
+        "ymin": ymin,
+        "sx": (xmax - xmin) / nx,
+        "sy": (ymax - ymin) / ny,
+        "nx": nx,
+        "ny": ny,
+        "size": (nx + 1) * (ny + 1) + nx * ny
+    }
+
+def get_hex_centers(extent=EXTENT, gridsize=GRIDSIZE):
+    #(size, 2) array of hex centers, in hex index order
+    grid = get_grid(extent, gridsize)
+    nx1, ny1, nx2, ny2 = grid["nx"] + 1, grid["ny"] + 1, grid["nx"], grid["ny"]
+
+    centers = np.zeros((grid["size"], 2))
+    centers[:nx1 * ny1, 0] = np.repeat(np.arange(nx1), ny1)
+    centers[:nx1 * ny1, 1] = np.tile(np.arange(ny1), nx1)
+    centers[nx1 * ny1:, 0] = np.repeat(np.arange(nx2) + 0.5, ny2)
+    centers[nx1 * ny1:, 1] = np.tile(np.arange(ny2), nx2) + 0.5
+
+    centers[:, 0] = centers[:, 0] * grid["sx"] + grid["xmin"]
+    centers[:, 1] = centers[:, 1] * grid["sy"] + grid["ymin"]
+    return centers
+
+def get_shot_coordinates(shots):
+    #Chart coordinates of a shot chart frame's LOC_X/LOC_Y
+    return shots["LOC_X"].to_numpy(dtype=float), shots["LOC_Y"].to_numpy(dtype=float) + Y_OFFSET
+
+def get_hex_indices(x, y, extent=EXTENT, gridsize=GRIDSIZE):
+    #Hex index of every point, -1 for points outside the grid
+    grid = get_grid(extent, gridsize)
+    nx1, ny1, nx2, ny2 = grid["nx"] + 1, grid["ny"] + 1, grid["nx"], grid["ny"]
+
+    ix = (np.asarray(x, dtype=float) - grid["xmin"]) / grid["sx"]
+    iy = (np.asarray(y, dtype=float) - grid["ymin"]) / grid["sy"]
+
+    #Nearest point on each lattice; whichever is closer (in hex distance) owns the point
+    ix1, iy1 = np.round(ix).astype(int), np.round(iy).astype(int)
+    ix2, iy2 = np.floor(ix).astype(int), np.floor(iy).astype(int)
+    d1 = (ix - ix1) ** 2 + 3.0 * (iy - iy1) ** 2
+    d2 = (ix - ix2 - 0.5) ** 2 + 3.0 * (iy - iy2 - 0.5) ** 2
+    on_first = d1 < d2
+
+    inside1 = (0 <= ix1) & (ix1 < nx1) & (0 <= iy1) & (iy1 < ny1)
+    inside2 = (0 <= ix2) & (ix2 < nx2) & (0 <= iy2) & (iy2 < ny2)
+
+    return np.where(
+        on_first,
+        np.where(inside1, ix1 * ny1 + iy1, -1),
+        np.where(inside2, nx1 * ny1 + ix2 * ny2 + iy2, -1)
+    )
+
+def count_shot_sets(x, y, made, set_ids, num_sets, extent=EXTENT, gridsize=GRIDSIZE):
+    """
+    Attempts and makes per hex for several shot sets at once, as (num_sets, hexes) int arrays.
+    set_ids says which set each shot belongs to; every (set, hex) pair gets one slot of a single
+    bincount, so all sets are binned in one pass however many there are.
+    """
+    size = get_grid(extent, gridsize)["size"]
+    indices = get_hex_indices(x, y, extent, gridsize)
+    inside = indices >= 0
+    slots = np.asarray(set_ids)[inside] * size + indices[inside]
+
+    attempts = np.bincount(slots, minlength=num_sets * size).reshape(num_sets, size)
+    makes = np.bincount(slots, weights=np.asarray(made, dtype=float)[inside], minlength=num_sets * size)
+    return attempts, makes.astype(int).reshape(num_sets, size)
+
+def get_hex_pcts(attempts, makes, min_attempts=1):
+    #FG% per hex, 0 where there are fewer than min_attempts shots
+    pcts = np.zeros(np.shape(attempts))
+    np.divide(makes, attempts, out=pcts, where=np.asarray(attempts) >= max(min_attempts, 1))
+    return pcts
+
+def bin_shot_sets(shot_sets, min_attempts=1, extent=EXTENT, gridsize=GRIDSIZE):
+    """
+    Attempts, makes and FG% per hex for a list of shot chart frames (e.g. league, team and lineup),
+    each as a (len(shot_sets), hexes) array in the order given.
+    """
+    shots = pd.concat(shot_sets, ignore_index=True)
+    x, y = get_shot_coordinates(shots)
+    set_ids = np.repeat(np.arange(len(shot_sets)), [len(shot_set) for shot_set in shot_sets])
+
+    attempts, makes = count_shot_sets(x, y, shots["SHOT_MADE_FLAG"].to_numpy(), set_ids, len(shot_sets), extent, gridsize)
+    return attempts, makes, get_hex_pcts(attempts, makes, min_attempts)
@@ -0,0 +1,153 @@
+import os
+import numpy as np
+import pandas as pd
+from nba_api.stats.endpoints import leaguegamelog, teamestimatedmetrics
+
+from pages.components.Data_Access import fetch
+
+#Kalman offensive rating (kORTG). Every team runs the same scalar filter (F = H = 1), so all 30 teams
+#are stacked into one state vector and advanced together, one step per game date. Each team only
+#steps on dates it played. The filter state is persisted, so a nightly run only folds in new games.
+
+data_dir = "pages/data/"
+state_path = data_dir + "kORTG_state.csv"
+trajectory_path = data_dir + "kORTG.csv"
+
+#Same noise settings as the original filterpy model
+PROCESS_NOISE = 0.001
+MEASUREMENT_NOISE = 1.0
+INITIAL_VARIANCE = 1.0
+
+def load_team_ratings(season="2023-24"):
+    ratings = fetch(teamestimatedmetrics.TeamEstimatedMetrics, season=season).get_data_frames()[0]
+    return ratings.set_index("TEAM_ID")[["TEAM_NAME", "E_OFF_RATING", "E_DEF_RATING"]]
+
+def load_game_log(fname=data_dir + "game_log.csv"):
+    return pd.read_csv(fname, dtype={"GAME_ID": str})
+
+def load_new_games(season="2023-24", date_from=""):
+    return fetch(leaguegamelog.LeagueGameLog, season=season, date_from_nullable=date_from, ttl=0).get_data_frames()[0]
+
+def get_game_defensive_ratings(games):
+    """
+    One row per team-game with the opponent's defensive rating in that game (points the team scored
+    per 100 possessions). Replaces the per-game boxscoreadvancedv3 requests with the team game log.
+    """
+    games = games.copy()
+    games["GAME_ID"] = games["GAME_ID"].astype(str).str.zfill(10)
+    games["POSS"] = games["FGA"] - games["OREB"] + games["TOV"] + 0.44 * games["FTA"]
+
+    #Both teams share a game's possessions, so average the two estimates
+    game_poss = games.groupby("GAME_ID")["POSS"].transform("mean")
+    games["OPP_DEF_RATING"] = 100.0 * games["PTS"] / game_poss
+
+    return games[["GAME_ID", "GAME_DATE", "TEAM_ID", "TEAM_ABBREVIATION", "OPP_DEF_RATING"]]
+
+def init_state(team_ratings):
+    state = pd.DataFrame({
+        "TEAM_ABBREVIATION": "",
+        "X": team_ratings["E_OFF_RATING"].astype(float),
+        "P": INITIAL_VARIANCE,
+        "LAST_GAME_DATE": ""
+    }, index=team_ratings.index)
+    state.index.name = "TEAM_ID"
+    return state
+
+def load_state(fname=state_path):
+    if not os.path.exists(fname):
+        return None
+    return pd.read_csv(fname, dtype={"LAST_GAME_DATE": str}, keep_default_na=False).set_index("TEAM_ID")
+
+def save_state(state, fname=state_path):
+    state.reset_index().to_csv(fname, index=False)
+
+def kalman_step(x, P, z, mask, q=PROCESS_NOISE, r=MEASUREMENT_NOISE):
+    #Scalar predict + update for every team at once; teams outside mask are left untouched
+    P_pred = P + q
+    K = P_pred / (P_pred + r)
+    x_new = np.where(mask, x + K * (z - x), x)
+    P_new = np.where(mask, (1 - K) * P_pred, P)
+    return x_new, P_new
+
+def run_filter(state, games, team_ratings):
+    """
+    Advance the filter over every game newer than each team's LAST_GAME_DATE.
+    Returns the new state and the filtered rating after each new game, per team abbreviation.
+    """
+    ratings = get_game_defensive_ratings(games)
+    ratings = ratings[ratings["TEAM_ID"].isin(state.index)]
+    last_dates = state["LAST_GAME_DATE"].reindex(ratings["TEAM_ID"]).to_numpy()
+    ratings = ratings[ratings["GAME_DATE"].to_numpy() > last_dates].sort_values("GAME_DATE")
+
+    team_ids = state.index.to_numpy()
+    team_pos = pd.Series(np.arange(len(team_ids)), index=team_ids)
+    league_avg = team_ratings["E_OFF_RATING"].mean()
+    season_off = team_ratings["E_OFF_RATING"].reindex(team_ids).to_numpy()
+
+    x = state["X"].to_numpy(dtype=float)
+    P = state["P"].to_numpy(dtype=float)
+    abbrevs = state["TEAM_ABBREVIATION"].to_numpy(dtype=object)
+    last = state["LAST_GAME_DATE"].to_numpy(dtype=object)
+    trajectories = {}
+
+    #Teams play at most once per date, so each date is a single vectorized step
+    for game_date, day in ratings.groupby("GAME_DATE", sort=True):
+        pos = team_pos[day["TEAM_ID"]].to_numpy()
+        mask = np.zeros(len(team_ids), dtype=bool)
+        mask[pos] = True
+
+        #Measurement from the original model: season offense scaled by the opponent's defense that night
+        z = np.zeros(len(team_ids))
+        z[pos] = season_off[pos] * day["OPP_DEF_RATING"].to_numpy() / league_avg
+
+        x, P = kalman_step(x, P, z, mask)
+        abbrevs[pos] = day["TEAM_ABBREVIATION"].to_numpy()
+        last[pos] = game_date
+        for i in pos:
+            trajectories.setdefault(abbrevs[i], []).append(x[i])
+
+    new_state = pd.DataFrame({"TEAM_ABBREVIATION": abbrevs, "X": x, "P": P, "LAST_GAME_DATE": last}, index=state.index)
+    return new_state, trajectories
+
+def append_trajectories(trajectories, fname=trajectory_path):
+    #kORTG.csv is wide: one column per team, one row per game, padded with NaN
+    columns = {}
+    if os.path.exists(fname):
+        existing = pd.read_csv(fname, index_col=0)
+        columns = {team: existing[team].dropna().tolist() for team in existing.columns}
+
+    for team, values in trajectories.items():
+        columns[team] = columns.get(team, []) + values
+
+    pd.DataFrame({team: pd.Series(values, dtype=float) for team, values in columns.items()}).to_csv(fname)
+
+def backfill(season="2023-24"):
+    #Whole season in one pass from the stored game log, replacing kORTG.csv
+    team_ratings = load_team_ratings(season)
+    state, trajectories = run_filter(init_state(team_ratings), load_game_log(), team_ratings)
+    if os.path.exists(trajectory_path):
+        os.remove(trajectory_path)
+    append_trajectories(trajectories)
+    save_state(state)
+
+def update(season="2023-24"):
+    #Nightly run: only games after the oldest LAST_GAME_DATE are requested and filtered
+    team_ratings = load_team_ratings(season)
+    state = load_state()
+    if state is None:
+        return backfill(season)
+
+    date_from = min(state["LAST_GAME_DATE"])
+    date_from = pd.to_datetime(date_from).strftime("%m/%d/%Y") if date_from else ""
+    state, trajectories = run_filter(state, load_new_games(season, date_from), team_ratings)
+    append_trajectories(trajectories)
+    save_state(state)
+
+#Run from the repo root with `python -m pages.src.kORTG [backfill]`
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        backfill()
+    else:
+        update()
@@ -0,0 +1,77 @@
+import os
+import json
+import numpy as np
+from nba_api.stats.endpoints import shotchartlineupdetail
+
+from pages.components.Data_Access import fetch_many, CURRENT_SEASON
+from pages.components.Data_Catalog import load_table, get_table_version
+from pages.src.hex_bins import EXTENT, GRIDSIZE, get_grid, bin_shot_sets
+
+#Shot charts for every lineup in lineup_evals_10_min, binned offline onto the fixed hex grid so the
+#Lineup Dashboard never calls shotchartlineupdetail or re-bins shots. Everything lives in one .npy file,
+#memory-mapped by the dashboard, of shape (1 + lineups, 2, hexes):
+#  row 0          every lineup's shots added up, the league baseline the lineups are compared against
+#  row i          the lineup at position i - 1 of "lineup_ids" in the index file
+#  channel 0 / 1  shot attempts / makes per hex
+#The index file next to it records the lineup order, grid, season and the lineup data version it was built from.
+
+tiles_path = "pages/data/lineup_shot_tiles.npy"
+tiles_index_path = "pages/data/lineup_shot_tiles.json"
+
+lineup_table = "lineup_evals_10_min"
+
+ATTEMPTS = 0
+MAKES = 1
+LEAGUE_ROW = 0
+
+def get_lineup_ids():
+    return load_table(lineup_table)["LINEUP_ID"].astype(str).tolist()
+
+def fetch_lineup_shots(lineup_ids, season=CURRENT_SEASON):
+    #One request per lineup through the shared response cache, so a build that dies part way resumes cheaply
+    param_list = [{"context_measure_detailed": "PTS", "group_id": lineup_id, "season": season} for lineup_id in lineup_ids]
+    return [response.get_data_frames()[0] for response in fetch_many(shotchartlineupdetail.ShotChartLineupDetail, param_list)]
+
+def build_tiles(season=CURRENT_SEASON, extent=EXTENT, gridsize=GRIDSIZE):
+    lineup_ids = get_lineup_ids()
+    shape = (1 + len(lineup_ids), 2, get_grid(extent, gridsize)["size"])
+
+    #Written next to the old file and swapped in at the end, so the dashboard never maps a partial file
+    partial_path = tiles_path + ".partial"
+    tiles = np.lib.format.open_memmap(partial_path, mode="w+", dtype=np.int32, shape=shape)
+    attempts, makes, pcts = bin_shot_sets(fetch_lineup_shots(lineup_ids, season), extent=extent, gridsize=gridsize)
+    tiles[1:, ATTEMPTS] = attempts
+    tiles[1:, MAKES] = makes
+    tiles[LEAGUE_ROW] = tiles[1:].sum(axis=0)
+    tiles.flush()
+    del tiles
+    os.replace(partial_path, tiles_path)
+
+    with open(tiles_index_path, "w") as f:
+        json.dump({
+            "season": season,
+            "extent": list(extent),
+            "gridsize": gridsize,
+            "source_version": get_table_version(lineup_table),
+            "lineup_ids": lineup_ids
+        }, f)
+
+def load_tiles_index():
+    with open(tiles_index_path) as f:
+        index = json.load(f)
+    index["rows"] = {lineup_id: row for row, lineup_id in enumerate(index["lineup_ids"], start=1)}
+    return index
+
+def load_tiles():
+    #Read-only memory map; only the rows that are looked at get paged in
+    return np.load(tiles_path, mmap_mode="r")
+
+def tiles_exist():
+    return os.path.exists(tiles_path) and os.path.exists(tiles_index_path)
+
+#Run from the repo root after lineup_evals_10_min.csv changes:
+#  python -m pages.src.lineup_shot_tiles [season]
+if __name__ == "__main__":
+    import sys
+
+    build_tiles(season=sys.argv[1] if len(sys.argv) > 1 else CURRENT_SEASON)
@@ -0,0 +1,349 @@
+import os
+import re
+import json
+import gzip
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from nba_api.live.nba.endpoints import scoreboard, playbyplay, boxscore
+from nba_api.live.nba.library.http import NBALiveHTTP
+
+from pages.components import Live_Feed
+
+#Record and replay live games, so the live dashboard can be run and benchmarked without a game on.
+#  record:    poll a game's scoreboard, playbyplay and boxscore files and append every changed body,
+#             with the seconds since recording started, to pages/cache/replays/<name>.jsonl.gz
+#  replay:    ReplaySession (installed with NBALiveHTTP.set_session) or a local HTTP server serves
+#             each file as it was at a replay clock time, with ETags, so nba_api and Live_Feed
+#             can't tell it apart from cdn.nba.com
+#  benchmark: step through a recording and time Live_Feed.load_game plus the dashboard renders
+#             at every refresh, with allocations and rows processed
+#  synthesize: write a made-up game in the recording format, for running the above without one
+
+replay_dir = "pages/cache/replays/"
+
+RECORD_INTERVAL = 5
+REPLAY_PORT = 8765
+
+def get_capture_path(name):
+    return replay_dir + name + ".jsonl.gz"
+
+def get_live_paths(game_id):
+    return [
+        scoreboard.ScoreBoard.endpoint_url,
+        playbyplay.PlayByPlay.endpoint_url.format(game_id=game_id),
+        boxscore.BoxScore.endpoint_url.format(game_id=game_id)
+    ]
+
+def get_path(url):
+    #Path of a live-data file relative to the liveData root, for cdn.nba.com or replay server URLs
+    url = url.split("?")[0]
+    return url.split("liveData/", 1)[1] if "liveData/" in url else url.lstrip("/")
+
+def is_game_final(scoreboard_body, game_id):
+    for game in json.loads(scoreboard_body)["scoreboard"]["games"]:
+        if game["gameId"] == game_id:
+            return game["gameStatusText"] == "Final"
+    return False
+
+def record(game_id, name=None, interval=RECORD_INTERVAL):
+    """
+    Record a game until the scoreboard shows it as final. Only changed bodies are written
+    (conditional requests), and the file is flushed after every capture, so a recording cut short
+    is still usable.
+    """
+    os.makedirs(replay_dir, exist_ok=True)
+    paths = get_live_paths(game_id)
+    etags = {}
+    start = time.time()
+    is_final = False
+
+    with gzip.open(get_capture_path(name or game_id), "at") as f:
+        while not is_final:
+            for path in paths:
+                headers = dict(NBALiveHTTP.headers)
+                if etags.get(path):
+                    headers["If-None-Match"] = etags[path]
+                try:
+                    response = NBALiveHTTP.get_session().get(NBALiveHTTP.base_url.format(endpoint=path), headers=headers, timeout=Live_Feed.REQUEST_TIMEOUT)
+                except Exception:
+                    continue
+                if response.status_code != 200:
+                    continue
+
+                etags[path] = response.headers.get("ETag")
+                f.write(json.dumps({"t": time.time() - start, "path": path, "body": response.text}) + "\n")
+                f.flush()
+                if path == paths[0]:
+                    is_final = is_game_final(response.text, game_id)
+
+            time.sleep(interval)
+
+def load_capture(name):
+    #{path: (sorted capture times, bodies)}
+    captures = {}
+    with gzip.open(get_capture_path(name), "rt") as f:
+        for line in f:
+            capture = json.loads(line)
+            times, bodies = captures.setdefault(capture["path"], ([], []))
+            times.append(capture["t"])
+            bodies.append(capture["body"])
+
+    return {path: (np.array(times), bodies) for path, (times, bodies) in captures.items()}
+
+def synthesize(name="synthetic", num_actions=520, seconds_per_action=6.0, game_id="0022300999", seed=1):
+    """
+    Write a made-up recording in the same format as record(): a four-period game with num_actions
+    plays, one playbyplay capture per play and a scoreboard and boxscore capture every 5 plays, then
+    a final scoreboard. Lets the replay and benchmark run without a recorded game.
+    """
+    rng = np.random.default_rng(seed)
+    away_players = [{"personId": i, "name": "Away Player " + str(i), "statistics": {"points": 0, "plusMinusPoints": 0}} for i in range(1, 6)]
+    home_players = [{"personId": i, "name": "Home Player " + str(i), "statistics": {"points": 0, "plusMinusPoints": 0}} for i in range(6, 11)]
+    paths = get_live_paths(game_id)
+    shot_values = {"2pt": 2, "3pt": 3, "freethrow": 1}
+    score = {1: 0, 2: 0}
+
+    def scoreboard_body(period, is_final=False):
+        return json.dumps({"scoreboard": {"games": [{
+            "gameId": game_id, "gameStatus": 3 if is_final else 2, "gameStatusText": "Final" if is_final else "Q" + str(period),
+            "period": period, "gameClock": "PT05M00.00S",
+            "awayTeam": {"teamTricode": "AWY", "teamName": "Away", "score": score[1]},
+            "homeTeam": {"teamTricode": "HME", "teamName": "Home", "score": score[2]}
+        }]}})
+
+    def boxscore_body():
+        return json.dumps({"game": {
+            "awayTeam": {"players": away_players, "statistics": {"points": score[1]}},
+            "homeTeam": {"players": home_players, "statistics": {"points": score[2]}}
+        }})
+
+    captures = [(0.0, paths[0], scoreboard_body(1)), (0.0, paths[2], boxscore_body())]
+    actions = []
+    for action_number in range(1, num_actions + 1):
+        period = min(4, (action_number - 1) * 4 // num_actions + 1)
+        action_type = str(rng.choice(["2pt", "3pt", "freethrow", "rebound", "turnover"]))
+        team = int(rng.integers(1, 3))
+        is_made = action_type in shot_values and rng.random() < 0.5
+        if is_made:
+            score[team] += shot_values[action_type]
+
+        actions.append({
+            "actionNumber": action_number, "period": period, "actionType": action_type, "possession": team, "teamId": team,
+            "personId": int(rng.integers(1, 6)) + 5 * (team - 1), "scoreAway": str(score[1]), "scoreHome": str(score[2]),
+            "description": action_type, "shotDistance": 5, "shotResult": "Made" if is_made else "Missed",
+            "isFieldGoal": int(action_type in ["2pt", "3pt"])
+        })
+
+        t = action_number * seconds_per_action
+        captures.append((t, paths[1], json.dumps({"game": {"actions": actions}})))
+        if action_number % 5 == 0:
+            captures += [(t, paths[0], scoreboard_body(period)), (t, paths[2], boxscore_body())]
+
+    captures.append((num_actions * seconds_per_action + 10, paths[0], scoreboard_body(4, is_final=True)))
+
+    os.makedirs(replay_dir, exist_ok=True)
+    with gzip.open(get_capture_path(name), "wt") as f:
+        for t, path, body in captures:
+            f.write(json.dumps({"t": t, "path": path, "body": body}) + "\n")
+
+def get_capture_game_id(captures):
+    for path in captures:
+        match = re.match(r"playbyplay/playbyplay_(\d+)\.json", path)
+        if match:
+            return match.group(1)
+    return None
+
+def get_capture_index(captures, path, t):
+    #Latest capture of path at or before t, -1 if it hadn't been captured yet
+    if path not in captures:
+        return -1
+    return int(np.searchsorted(captures[path][0], t, side="right")) - 1
+
+def get_replay_response(captures, path, t, if_none_match=None):
+    #(status, body, etag) of path at replay time t
+    i = get_capture_index(captures, path, t)
+    if i < 0:
+        return 404, "", None
+
+    etag = '"' + str(i) + '"'
+    if if_none_match == etag:
+        return 304, "", etag
+    return 200, captures[path][1][i], etag
+
+class ReplayClock:
+    #Replay time in seconds since the recording started, running at `speed`, or pinned with set()
+    def __init__(self, speed=1.0, start=0.0):
+        self.speed = speed
+        self.start = start
+        self.started_at = time.monotonic()
+        self.pinned = None
+
+    def now(self):
+        if self.pinned is not None:
+            return self.pinned
+        return self.start + (time.monotonic() - self.started_at) * self.speed
+
+    def set(self, t):
+        self.pinned = t
+
+class ReplayResponse:
+    def __init__(self, status_code, text, etag, url):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {"ETag": etag} if etag else {}
+        self.url = url
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception("Replay has no capture for " + self.url + " yet")
+
+class ReplaySession:
+    #Stands in for the requests session nba_api and Live_Feed use
+    def __init__(self, captures, clock):
+        self.captures = captures
+        self.clock = clock
+
+    def get(self, url, params=None, headers=None, proxies=None, timeout=None):
+        if_none_match = (headers or {}).get("If-None-Match")
+        status, body, etag = get_replay_response(self.captures, get_path(url), self.clock.now(), if_none_match)
+        return ReplayResponse(status, body, etag, url)
+
+def serve(captures, clock, port=REPLAY_PORT):
+    """
+    Serve a recording over HTTP. Point the dashboard at it with
+    NBA_LIVE_DATA_URL=http://localhost:<port>/static/json/liveData streamlit run Hello.py
+    """
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, body, etag = get_replay_response(captures, get_path(self.path), clock.now(), self.headers.get("If-None-Match"))
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            if body:
+                self.wfile.write(body.encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass
+
+    ThreadingHTTPServer(("localhost", port), ReplayHandler).serve_forever()
+
+def get_refresh_times(captures, game_id, step):
+    pbp_times = captures[get_live_paths(game_id)[1]][0]
+    return np.arange(pbp_times[0], pbp_times[-1] + step, step)
+
+def run_refreshes(captures, game_id, refresh_times, render, track_allocations):
+    #One dashboard refresh per replay time, as the background poller and a viewing session would do it
+    from pages.components.Live_Game_Dashboard import get_pbp_data, render_score_breakdown, render_pbp
+
+    clock = ReplayClock()
+    #The replay session, poll interval and replayed game state are only in place for this run
+    previous_session, previous_interval = NBALiveHTTP._session, Live_Feed.MIN_POLL_INTERVAL
+    NBALiveHTTP.set_session(ReplaySession(captures, clock))
+    Live_Feed.MIN_POLL_INTERVAL = 0
+    Live_Feed.clear_state()
+
+    try:
+        rows = []
+        num_actions = 0
+        for t in refresh_times:
+            clock.set(t)
+            scoreboard_game = Live_Feed.get_scoreboard_game(game_id)
+            #Finished games switch to PlayByPlayV3, which isn't part of a recording
+            if scoreboard_game is None or scoreboard_game["gameStatusText"] == "Final":
+                break
+
+            if track_allocations:
+                tracemalloc.reset_peak()
+                allocated_before = tracemalloc.get_traced_memory()[0]
+
+            start = time.perf_counter()
+            scoreboard_game, pbp_chunks, away_team_data, home_team_data, away_team_statistics, home_team_statistics = Live_Feed.load_game(game_id)
+            load_time = time.perf_counter() - start
+            total_actions = sum(len(chunk) for chunk in pbp_chunks)
+
+            render_time = 0.0
+            if render:
+                start = time.perf_counter()
+                pbp_data = get_pbp_data(game_id, pbp_chunks)
+                render_score_breakdown(pbp_data, scoreboard_game)
+                render_pbp(pbp_data, scoreboard_game, away_team_data, home_team_data)
+                render_time = time.perf_counter() - start
+
+            row = {
+                "REPLAY_TIME": t,
+                "PERIOD": int(pbp_chunks[-1]["period"].iloc[-1]),
+                "ACTIONS": total_actions,
+                "NEW_ACTIONS": total_actions - num_actions,
+                "LOAD_MS": load_time * 1000,
+                "RENDER_MS": render_time * 1000
+            }
+            if track_allocations:
+                row["PEAK_ALLOCATED_KB"] = (tracemalloc.get_traced_memory()[1] - allocated_before) / 1024
+            rows.append(row)
+            num_actions = total_actions
+    finally:
+        NBALiveHTTP.set_session(previous_session)
+        Live_Feed.MIN_POLL_INTERVAL = previous_interval
+        Live_Feed.clear_state()
+
+    return pd.DataFrame(rows)
+
+def benchmark(name, step=RECORD_INTERVAL, render=True):
+    """
+    Per-refresh latency, peak allocations and rows processed across a recorded game. Timings and
+    allocations come from separate passes, since tracemalloc slows everything it traces.
+    """
+    captures = load_capture(name)
+    game_id = get_capture_game_id(captures)
+    refresh_times = get_refresh_times(captures, game_id, step)
+
+    results = run_refreshes(captures, game_id, refresh_times, render, track_allocations=False)
+
+    tracemalloc.start()
+    try:
+        allocations = run_refreshes(captures, game_id, refresh_times, render, track_allocations=True)
+    finally:
+        tracemalloc.stop()
+    results["PEAK_ALLOCATED_KB"] = allocations["PEAK_ALLOCATED_KB"]
+
+    return results
+
+def summarize(results):
+    #Refresh cost by period; a healthy pipeline stays flat as the game goes on
+    return results.groupby("PERIOD").agg(
+        REFRESHES=("LOAD_MS", "size"),
+        ACTIONS=("ACTIONS", "max"),
+        NEW_ACTIONS=("NEW_ACTIONS", "mean"),
+        LOAD_MS=("LOAD_MS", "mean"),
+        LOAD_MS_P95=("LOAD_MS", lambda ms: ms.quantile(0.95)),
+        RENDER_MS=("RENDER_MS", "mean"),
+        PEAK_ALLOCATED_KB=("PEAK_ALLOCATED_KB", "mean")
+    )
+
+#Run from the repo root:
+#  python -m pages.src.live_replay record <game_id> [name]
+#  python -m pages.src.live_replay serve <name> [speed] [port]
+#  python -m pages.src.live_replay benchmark <name> [step seconds] [results csv]
+#  python -m pages.src.live_replay synthesize [name] [actions]
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1]
+    if command == "record":
+        record(sys.argv[2], name=sys.argv[3] if len(sys.argv) > 3 else None)
+    elif command == "serve":
+        speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+        port = int(sys.argv[4]) if len(sys.argv) > 4 else REPLAY_PORT
+        serve(load_capture(sys.argv[2]), ReplayClock(speed=speed), port=port)
+    elif command == "synthesize":
+        synthesize(name=sys.argv[2] if len(sys.argv) > 2 else "synthetic", num_actions=int(sys.argv[3]) if len(sys.argv) > 3 else 520)
+    elif command == "benchmark":
+        results = benchmark(sys.argv[2], step=float(sys.argv[3]) if len(sys.argv) > 3 else RECORD_INTERVAL)
+        print(summarize(results).round(2).to_string())
+        if len(sys.argv) > 4:
+            results.to_csv(sys.argv[4], index=False)
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+#Incremental play-by-play enrichment. A game's state holds every action enriched so far plus the
+#running values needed to continue from the last one (scores, possession count). Each refresh only
+#enriches actions with an actionNumber above the last one seen, in bulk, so the cost of a refresh
+#depends on how many plays happened since the previous one, not on how far into the game it is.
+#Enriched actions are kept as a tuple of chunks rather than one growing frame; the full frame is only
+#put together when a reader asks for it (combine_actions).
+#Works on both the live playbyplay feed and the PlayByPlayV3 frame used for finished games.
+
+#Points for a made shot, by live feed actionType
+shot_values = {
+    "2pt": 2,
+    "3pt": 3,
+    "freethrow": 1,
+}
+
+def new_pbp_state():
+    return {
+        "last_action_number": -1,
+        "chunks": (),
+        "score_home": 0,
+        "score_away": 0,
+        "possession_team": 0,
+        "possession_number": 0,
+    }
+
+def build_roster_index(players_frames):
+    """
+    personId -> PLAYER_NAME, PLAYER_TEAM from the box score player frames, given as
+    {team tricode: frame}. Used instead of the static player list, which is missing rookies and
+    two-way players.
+    """
+    rosters = [
+        pd.DataFrame({"PLAYER_NAME": frame["name"].to_numpy(), "PLAYER_TEAM": tricode}, index=frame["personId"].to_numpy())
+        for tricode, frame in players_frames.items()
+    ]
+    roster = pd.concat(rosters)
+    return roster[~roster.index.duplicated()]
+
+def get_running_scores(scores, previous):
+    #V3 frames leave the score blank on non-scoring plays, carry the last known score forward
+    return pd.to_numeric(scores, errors="coerce").ffill().fillna(previous).to_numpy(dtype=int)
+
+def get_shot_values(actions):
+    if "shotValue" in actions.columns:
+        return pd.to_numeric(actions["shotValue"], errors="coerce").fillna(0).to_numpy(dtype=int)
+    return actions["actionType"].map(shot_values).fillna(0).to_numpy(dtype=int)
+
+def get_possession_numbers(possession_teams, previous_team, previous_number):
+    #A new possession starts every time the team in possession changes; 0 means nobody has the ball
+    teams = pd.Series(possession_teams).replace(0, np.nan).ffill().fillna(previous_team).to_numpy()
+    previous = np.concatenate([[previous_team], teams[:-1]])
+    changes = (teams != previous) & (teams != 0)
+    return teams, previous_number + np.cumsum(changes)
+
+def enrich_actions(actions, roster, state, fallback_names=None):
+    #Derived columns for a chunk of new actions, continuing from the running values in state
+    actions = actions.copy()
+
+    player_ids = pd.to_numeric(actions["personId"], errors="coerce")
+    players = roster.reindex(player_ids)
+    actions["player_name"] = players["PLAYER_NAME"].to_numpy()
+    if fallback_names is not None and actions["player_name"].isna().any():
+        actions["player_name"] = actions["player_name"].fillna(pd.Series(fallback_names(player_ids).to_numpy(), index=actions.index))
+    actions["player_team"] = players["PLAYER_TEAM"].to_numpy()
+
+    actions["scoreHome"] = get_running_scores(actions["scoreHome"], state["score_home"])
+    actions["scoreAway"] = get_running_scores(actions["scoreAway"], state["score_away"])
+    actions["margin"] = actions["scoreAway"] - actions["scoreHome"]
+
+    actions["shot_value"] = get_shot_values(actions)
+
+    #The live feed records who has the ball, V3 frames only who acted
+    possession_column = "possession" if "possession" in actions.columns else "teamId"
+    possession_teams = pd.to_numeric(actions[possession_column], errors="coerce").fillna(0).to_numpy()
+    teams, actions["possession_number"] = get_possession_numbers(possession_teams, state["possession_team"], state["possession_number"])
+
+    return actions, teams[-1]
+
+def append_chunk(chunks, chunk):
+    """
+    Add a chunk of enriched actions, merging the newest chunks while they're of similar size. Chunks
+    stay in decreasing size, so a game has O(log n) of them and each action is copied O(log n) times
+    over the whole game, however late the refresh. Returns a new tuple; readers holding the old one
+    are unaffected.
+    """
+    chunks = chunks + (chunk,)
+    while len(chunks) > 1 and len(chunks[-2]) <= 2 * len(chunks[-1]):
+        chunks = chunks[:-2] + (pd.concat(chunks[-2:], ignore_index=True),)
+    return chunks
+
+def combine_actions(chunks):
+    #Every enriched action as one frame, None before the first refresh
+    if len(chunks) == 0:
+        return None
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+def update_pbp_state(state, actions, roster, fallback_names=None):
+    """
+    Enrich and append the actions newer than the last one in state. Returns True if anything was added.
+    Re-running with the same actions is a no-op.
+    """
+    action_numbers = pd.to_numeric(actions["actionNumber"], errors="coerce").to_numpy()
+    new_actions = actions[action_numbers > state["last_action_number"]]
+    if len(new_actions) == 0:
+        return False
+
+    new_actions = new_actions.sort_values("actionNumber")
+    enriched, possession_team = enrich_actions(new_actions, roster, state, fallback_names=fallback_names)
+
+    state["chunks"] = append_chunk(state["chunks"], enriched.reset_index(drop=True))
+    state["last_action_number"] = int(enriched["actionNumber"].iloc[-1])
+    state["score_home"] = int(enriched["scoreHome"].iloc[-1])
+    state["score_away"] = int(enriched["scoreAway"].iloc[-1])
+    state["possession_team"] = possession_team
+    state["possession_number"] = int(enriched["possession_number"].iloc[-1])
+
+    return True
+
+#Score trajectories drawn per period are thinned to at most this many actions
+MAX_TRAJECTORY_POINTS = 60
+
+def summarize_periods(actions):
+    """
+    One row per period: where the period's actions start and end in the frame, its last action
+    number and the score and away-minus-home margin after it. Actions are sorted by actionNumber,
+    so each period is one contiguous block and a single pass over the period column finds them all.
+    """
+    periods = actions["period"].to_numpy()
+    starts = np.flatnonzero(np.concatenate([[True], periods[1:] != periods[:-1]]))
+    ends = np.concatenate([starts[1:], [len(periods)]])
+    last_rows = actions.iloc[ends - 1]
+
+    summary = pd.DataFrame({
+        "PERIOD": periods[starts],
+        "START": starts,
+        "END": ends,
+        "LAST_ACTION": last_rows["actionNumber"].to_numpy(),
+        "SCORE_AWAY": last_rows["scoreAway"].to_numpy(dtype=int),
+        "SCORE_HOME": last_rows["scoreHome"].to_numpy(dtype=int)
+    })
+    summary["MARGIN"] = summary["SCORE_AWAY"] - summary["SCORE_HOME"]
+
+    return summary
+
+def downsample_trajectory(period_actions, max_points=MAX_TRAJECTORY_POINTS):
+    """
+    Score trajectory of a period with a bounded number of points: only actions that changed the
+    score (plus the first and last), thinned evenly if there are still more than max_points.
+    """
+    trajectory = period_actions[["actionNumber", "scoreAway", "scoreHome"]]
+    scores = trajectory[["scoreAway", "scoreHome"]].to_numpy()
+    changed = np.concatenate([[True], (scores[1:] != scores[:-1]).any(axis=1)])
+    changed[-1] = True
+    rows = np.flatnonzero(changed)
+
+    if len(rows) > max_points:
+        rows = rows[np.unique(np.linspace(0, len(rows) - 1, max_points).round().astype(int))]
+    return trajectory.iloc[rows]
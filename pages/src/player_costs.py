@@ -0,0 +1,138 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from pages.components.Player_Index import merge_on_name
+
+#The roster model's player table (salary, cost, estimated ratings and possessions per game for every
+#player), built offline from the CSVs in pages/data and saved as a Feather file. The index file next to
+#it records a SHA-256 of the inputs' contents and the build parameters; the table is rebuilt only when
+#that hash changes, so editing or replacing any input file is all it takes to refresh it.
+#Columns:
+#  s             2023-24 salary as a fraction of the cap
+#  c             cost, the larger of s and the mean s of the 7 players around them in EPM rank
+#  eo, ed        estimated offensive/defensive rating per possession
+#  np            possessions per game
+#  yos           years of service (NaN if the player isn't in player_service.csv yet)
+#  min_eligible  1 if the player can be signed with the minimum salary exception
+#Years of service and minimum exception eligibility come from player_service.csv, which is kept by hand;
+#a player missing from it is still a candidate, just not minimum-exception eligible.
+
+data_dir = "pages/data/"
+costs_dir = "pages/cache/player_costs/"
+costs_path = costs_dir + "player_costs.feather"
+costs_index_path = costs_dir + "player_costs.json"
+
+input_paths = {
+    "salaries": data_dir + "salary_data.csv",
+    "epm": data_dir + "epm_data.csv",
+    "estimated_metrics": data_dir + "e_mets.csv",
+    "usage": data_dir + "usage_data.csv",
+    "service": data_dir + "player_service.csv"
+}
+
+#The table the roster page read before this build existed; compare_with_reference reports how it differs
+reference_path = data_dir + "player_df.csv"
+
+SEASON = "2023-24"
+SALARY_CAP = 136000000
+#Players on each side of a player in EPM rank whose salaries set their comparable cost
+COMPARABLE_PLAYERS = 3
+
+def get_inputs_hash(season=SEASON, salary_cap=SALARY_CAP):
+    digest = hashlib.sha256(json.dumps([season, salary_cap, COMPARABLE_PLAYERS]).encode())
+    for name, path in sorted(input_paths.items()):
+        with open(path, "rb") as f:
+            digest.update(name.encode())
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def read_salaries(season=SEASON, salary_cap=SALARY_CAP):
+    #"$47,607,350 " -> 0.35; a player listed on several teams keeps their first (largest) contract
+    salaries = pd.read_csv(input_paths["salaries"], encoding="utf-8-sig", usecols=["Player", season]).dropna()
+    salaries = salaries.drop_duplicates("Player")
+    amounts = salaries[season].str.replace(r"[$,\s]", "", regex=True).astype(int)
+    return pd.DataFrame({"Player": salaries["Player"].to_numpy(), "s": amounts.to_numpy() / salary_cap})
+
+def read_epm_ranks():
+    epm = pd.read_csv(input_paths["epm"], usecols=["name", "epm"])
+    return pd.DataFrame({"name": epm["name"], "epm_rank": epm["epm"].rank(method="min", ascending=False).astype(int)})
+
+def add_costs(salaries):
+    #Cost is the larger of a player's salary and the mean salary of the players ranked around them,
+    #a centered rolling mean that shrinks at either end of the ranking
+    ranked = merge_on_name(salaries, "Player", read_epm_ranks(), "name").dropna()
+    ranked = ranked.sort_values("epm_rank", kind="stable").reset_index(drop=True)
+    comparable = ranked["s"].rolling(2 * COMPARABLE_PLAYERS + 1, center=True, min_periods=1).mean()
+    return ranked.assign(c=np.maximum(comparable, ranked["s"]))[["Player", "s", "c"]]
+
+def add_ratings(player_df):
+    metrics = pd.read_csv(input_paths["estimated_metrics"], usecols=["PLAYER_NAME", "E_OFF_RATING", "E_DEF_RATING"])
+    ratings = pd.DataFrame({
+        "PLAYER_NAME": metrics["PLAYER_NAME"],
+        "eo": metrics["E_OFF_RATING"].astype(float) / 100.0,
+        "ed": metrics["E_DEF_RATING"].astype(float) / 100.0
+    })
+    return merge_on_name(player_df, "Player", ratings, "PLAYER_NAME", how="inner")
+
+def add_possessions(player_df):
+    usage = pd.read_csv(input_paths["usage"], encoding="utf-8-sig", usecols=["PLAYER", "GP", "POSS"])
+    possessions = pd.DataFrame({"PLAYER": usage["PLAYER"], "np": usage["POSS"] / usage["GP"]})
+    return merge_on_name(player_df, "Player", possessions, "PLAYER", how="inner")
+
+def add_service(player_df):
+    service = pd.read_csv(input_paths["service"], usecols=["Player", "yos", "min_eligible"])
+    player_df = merge_on_name(player_df, "Player", service, "Player", how="left")
+    return player_df.assign(min_eligible=player_df["min_eligible"].fillna(0).astype(int))
+
+def build_player_costs(season=SEASON, salary_cap=SALARY_CAP):
+    inputs_hash = get_inputs_hash(season, salary_cap)
+    player_df = add_service(add_possessions(add_ratings(add_costs(read_salaries(season, salary_cap)))))
+
+    #Written next to the old files and swapped in, so a reader never sees a table without its index
+    os.makedirs(costs_dir, exist_ok=True)
+    feather.write_feather(player_df.reset_index(drop=True), costs_path + ".partial")
+    with open(costs_index_path + ".partial", "w") as f:
+        json.dump({"season": season, "salary_cap": salary_cap, "inputs_hash": inputs_hash}, f)
+    os.replace(costs_path + ".partial", costs_path)
+    os.replace(costs_index_path + ".partial", costs_index_path)
+    return inputs_hash
+
+def get_built_hash():
+    if not (os.path.exists(costs_path) and os.path.exists(costs_index_path)):
+        return None
+    with open(costs_index_path) as f:
+        return json.load(f)["inputs_hash"]
+
+def load_player_costs(season=SEASON, salary_cap=SALARY_CAP):
+    #The saved table, rebuilt first if any input changed since it was written
+    if get_built_hash() != get_inputs_hash(season, salary_cap):
+        build_player_costs(season, salary_cap)
+    return feather.read_table(costs_path).to_pandas()
+
+def compare_with_reference(player_df, reference_fname=reference_path, tol=1e-9):
+    """
+    Per column, how many players shared with the reference table have a different value and the
+    largest difference, plus the players only in one of the two.
+    """
+    reference = pd.read_csv(reference_fname)
+    shared = player_df.merge(reference, on="Player", suffixes=("", "_reference"))
+    columns = [column for column in ["s", "c", "eo", "ed", "np", "yos", "min_eligible"] if column + "_reference" in shared.columns]
+    differences = pd.DataFrame({column: (shared[column] - shared[column + "_reference"]).abs() for column in columns})
+
+    return {
+        "changed": pd.DataFrame({"PLAYERS": (differences > tol).sum(), "MAX_DIFFERENCE": differences.max()}),
+        "added": sorted(set(player_df["Player"]) - set(reference["Player"])),
+        "dropped": sorted(set(reference["Player"]) - set(player_df["Player"]))
+    }
+
+#Run from the repo root to rebuild ahead of time and see how the table differs from player_df.csv:
+#  python -m pages.src.player_costs
+if __name__ == "__main__":
+    print(build_player_costs())
+    comparison = compare_with_reference(load_player_costs())
+    print(comparison["changed"].to_string())
+    print("Added:", len(comparison["added"]), "Dropped:", len(comparison["dropped"]))
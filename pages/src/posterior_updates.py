@@ -0,0 +1,195 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from nba_api.stats.endpoints import leaguegamelog
+
+from pages.components.Data_Access import fetch
+from pages.src.b3PT import build_b3P_table, percentile_ranks, history_seasons
+
+#Incremental b3P% and dAPM (decayed adjusted plus-minus). Instead of refitting every player from
+#scratch, each player's sufficient statistics are kept in a small state file and every new player-game
+#is folded into them:
+#  b3P%: season FG3M/FG3A, with earlier seasons' totals as the prior (posterior is closed form, see b3PT.py)
+#  dAPM: exponentially decayed moments of margin-adjusted plus-minus. Every new game multiplies the
+#        old moments by DAPM_DECAY, so W = sum(w), S = sum(w x), Q = sum(w x^2), R = sum(w^2)
+#        can be advanced without revisiting old games.
+#dAPM is on the plus-minus scale (points per game), not the bounded scale of the original MCMC bWPM fit,
+#so it goes to its own file; bWPM.csv is left as shipped.
+
+data_dir = "pages/data/"
+state_path = data_dir + "posterior_state.csv"
+
+DAPM_DECAY = 0.98
+NUM_PLAYERS = 200
+
+state_columns = [
+    "PLAYER_ID", "PLAYER_NAME", "LAST_GAME_ID", "GP", "MIN",
+    "FG3M", "FG3A", "HISTORICAL_FG3M", "HISTORICAL_FG3A",
+    "PM_W", "PM_S", "PM_Q", "PM_R"
+]
+
+def empty_state():
+    state = pd.DataFrame({column: pd.Series(dtype=float) for column in state_columns})
+    state = state.astype({"PLAYER_ID": "int64", "PLAYER_NAME": object, "LAST_GAME_ID": object})
+    return state.set_index("PLAYER_ID")
+
+def load_state(fname=state_path):
+    if not os.path.exists(fname):
+        return empty_state()
+    return pd.read_csv(fname, dtype={"LAST_GAME_ID": str}).set_index("PLAYER_ID")
+
+def save_state(state, fname=state_path):
+    state.reset_index().to_csv(fname, index=False)
+
+def load_player_games(season, date_from="", ttl=0):
+    #Player and team logs for every game since date_from; the team log gives each game's final margin
+    player_games, team_games = [
+        fetch(leaguegamelog.LeagueGameLog, season=season, player_or_team_abbreviation=mode, date_from_nullable=date_from, ttl=ttl).get_data_frames()[0]
+        for mode in ["P", "T"]
+    ]
+    margins = team_games[["GAME_ID", "TEAM_ID", "PLUS_MINUS"]].rename(columns={"PLUS_MINUS": "TEAM_MARGIN"})
+
+    return player_games.merge(margins, on=["GAME_ID", "TEAM_ID"], how="left")
+
+def adjusted_plus_minus(games):
+    #Player plus-minus relative to the share of the final margin expected from their minutes
+    return games["PLUS_MINUS"].fillna(0) - games["TEAM_MARGIN"].fillna(0) * games["MIN"].fillna(0) / 48.0
+
+def new_games_only(state, games):
+    last_game_ids = state["LAST_GAME_ID"].reindex(games["PLAYER_ID"]).fillna("").to_numpy()
+    return games[games["GAME_ID"].to_numpy() > last_game_ids]
+
+def fold_games(state, games, decay=DAPM_DECAY):
+    """
+    Fold a batch of player-game rows into the state; rows already seen are skipped, so re-running
+    a refresh over the same dates is a no-op. Cost is linear in the number of new player-games.
+    """
+    games = new_games_only(state, games).sort_values(["PLAYER_ID", "GAME_ID"])
+    if len(games) == 0:
+        return state
+
+    #A game followed by r newer games in this batch is decayed r times by the end of the batch
+    games_after = games.groupby("PLAYER_ID").cumcount(ascending=False).to_numpy()
+    weights = decay ** games_after
+    x = adjusted_plus_minus(games).to_numpy()
+
+    batch = pd.DataFrame({
+        "PLAYER_ID": games["PLAYER_ID"].to_numpy(),
+        "GP": 1,
+        "MIN": games["MIN"].fillna(0).to_numpy(),
+        "FG3M": games["FG3M"].fillna(0).to_numpy(),
+        "FG3A": games["FG3A"].fillna(0).to_numpy(),
+        "PM_W": weights,
+        "PM_S": weights * x,
+        "PM_Q": weights * x ** 2,
+        "PM_R": weights ** 2
+    }).groupby("PLAYER_ID").sum()
+
+    last = games.groupby("PLAYER_ID")[["PLAYER_NAME", "GAME_ID"]].last().rename(columns={"GAME_ID": "LAST_GAME_ID"})
+
+    state = state.reindex(state.index.union(batch.index))
+    sums = ["GP", "MIN", "FG3M", "FG3A"]
+    state[sums] = state[sums].fillna(0).add(batch[sums], fill_value=0)
+
+    #Old moments are decayed once per new game the player played in this batch
+    old_decay = pd.Series(decay, index=batch.index) ** batch["GP"]
+    old_decay = old_decay.reindex(state.index).fillna(1.0)
+    moments = ["PM_W", "PM_S", "PM_Q"]
+    state[moments] = state[moments].fillna(0).mul(old_decay, axis=0).add(batch[moments], fill_value=0)
+    state["PM_R"] = state["PM_R"].fillna(0) * old_decay ** 2 + batch["PM_R"].reindex(state.index).fillna(0)
+
+    state[["HISTORICAL_FG3M", "HISTORICAL_FG3A"]] = state[["HISTORICAL_FG3M", "HISTORICAL_FG3A"]].fillna(0)
+    state.loc[last.index, "PLAYER_NAME"] = last["PLAYER_NAME"]
+    state.loc[last.index, "LAST_GAME_ID"] = last["LAST_GAME_ID"]
+
+    return state
+
+def start_season(state):
+    #Last season's 3P totals move into the prior and the season totals reset; dAPM moments carry over
+    state = state.copy()
+    state["HISTORICAL_FG3M"] += state["FG3M"]
+    state["HISTORICAL_FG3A"] += state["FG3A"]
+    state[["GP", "MIN", "FG3M", "FG3A"]] = 0
+    return state
+
+def backfill(seasons, decay=DAPM_DECAY):
+    """
+    Build the state from scratch by folding whole seasons in order, one pair of league game log
+    requests per season. The last season in the list is treated as the current one.
+    """
+    state = empty_state()
+    for season in seasons:
+        state = start_season(state)
+        state = fold_games(state, load_player_games(season, ttl="auto"), decay=decay)
+
+    return state
+
+def refresh(state, season, date_from=""):
+    #Nightly update: only games since date_from are downloaded and folded in
+    return fold_games(state, load_player_games(season, date_from=date_from))
+
+def get_historical_pct(state):
+    #Players without a shooting history get the league's historical 3P% as their prior mean
+    league_pct = state["HISTORICAL_FG3M"].sum() / state["HISTORICAL_FG3A"].sum()
+    return (state["HISTORICAL_FG3M"] / state["HISTORICAL_FG3A"].where(state["HISTORICAL_FG3A"] > 0)).fillna(league_pct)
+
+def get_top_players(state, num_players=NUM_PLAYERS):
+    minutes_per_game = state["MIN"] / state["GP"].where(state["GP"] > 0)
+    return state.loc[minutes_per_game.nlargest(num_players).index]
+
+def build_dAPM_table(state, credible_level=0.95):
+    #Flat prior with a normal likelihood: the posterior of the player's mean adjusted plus-minus is
+    #normal around the weighted mean, with variance shrinking with the effective number of games
+    mean = state["PM_S"] / state["PM_W"]
+    variance = np.maximum(state["PM_Q"] / state["PM_W"] - mean ** 2, 0)
+    effective_games = state["PM_W"] ** 2 / state["PM_R"]
+    posterior_std = np.sqrt(variance / effective_games)
+    z = norm.ppf(1 - (1 - credible_level) / 2)
+
+    out = pd.DataFrame({
+        "PLAYER_NAME": state["PLAYER_NAME"].to_numpy(),
+        "PLAYER_ID": state.index.to_numpy(),
+        "MEAN": mean.round(3).to_numpy(),
+        "CI_LOWER_BOUND": (mean - z * posterior_std).round(3).to_numpy(),
+        "CI_UPPER_BOUND": (mean + z * posterior_std).round(3).to_numpy()
+    })
+    out["Z_SCORE"] = (out["MEAN"] - out["MEAN"].mean()) / out["MEAN"].std()
+    out["PERCENTILE"] = percentile_ranks(out["MEAN"])
+
+    return out
+
+def write_posteriors(state, b3P_fname=data_dir + "b3P.csv", dAPM_fname=data_dir + "dAPM.csv"):
+    #Without earlier seasons there is no league 3P% to fall back on, and the shipped files would be
+    #overwritten with NaN posteriors, so check everything before writing anything
+    if state["HISTORICAL_FG3A"].sum() == 0:
+        raise Exception("State has no historical 3P attempts; run backfill before writing posteriors")
+
+    top = get_top_players(state)
+    shooters = top[top["FG3A"] > 0]
+
+    historical_pct = get_historical_pct(state).loc[shooters.index]
+
+    b3P = build_b3P_table(shooters.index.to_numpy(), shooters["PLAYER_NAME"].to_numpy(), historical_pct.to_numpy(),
+                          shooters["FG3A"].to_numpy(), shooters["FG3M"].to_numpy())
+    dAPM = build_dAPM_table(top)
+    for name, table in [("b3P", b3P), ("dAPM", dAPM)]:
+        if table.select_dtypes("number").isna().any().any():
+            raise Exception(name + " posteriors contain NaN; not overwriting the shipped file")
+
+    b3P.to_csv(b3P_fname)
+    dAPM.to_csv(dAPM_fname)
+
+#Run from the repo root with `python -m pages.src.posterior_updates [YYYY-MM-DD]`
+if __name__ == "__main__":
+    import sys
+
+    season = "2023-24"
+    date_from = sys.argv[1] if len(sys.argv) > 1 else ""
+    #The first run has no state to refresh, so it builds one from the prior seasons and this one
+    if os.path.exists(state_path):
+        state = refresh(load_state(), season, date_from=date_from)
+    else:
+        state = backfill(list(history_seasons) + [season])
+    save_state(state)
+    write_posteriors(state)